@@ -0,0 +1,189 @@
+# bench_astar.py
+#
+# A* 처리량(paths/sec) 측정 — 기존 dict 기반 구현과 배열 기반 astar_pathfinding 비교.
+# 같은 무작위 질의에 대해 두 구현의 경로가 같은지도 확인한다.
+# --hpa True 이면 먼 질의에 대해 HPA* (전체 세밀화 / 앞부분만 세밀화) 속도와 경로 비용도 비교.
+# --landmarks True 이면 ALT 휴리스틱 A* 의 속도, 확장 셀 수, 경로 비용 (최적값 = 거리장) 도 비교.
+#
+#   python -m benchmarks.bench_astar                   (저장소 루트에서 실행)
+#   python -m benchmarks.bench_astar --queries 50 --max_dist 300
+#   python -m benchmarks.bench_astar --hpa True --max_dist 400 --skip_reference True
+#   python -m benchmarks.bench_astar --landmarks True --skip_reference True
+
+import argparse
+import math
+import random
+import time
+from heapq import heappush, heappop
+
+import modules.map
+from modules.map import Map, astar_pathfinding, build_distance_field
+from modules.hpa import HierarchicalPathfinder, HPA_MIN_DISTANCE
+from modules.landmarks import LandmarkSet
+
+
+def astar_pathfinding_dict(battle_map: Map, start, goal):
+    """기존 구현 (dict + get_neighbors) — 비교 기준"""
+    def heuristic(a, b):
+        return math.sqrt((a[0] - b[0])**2 + (a[1] - b[1])**2)
+
+    open_set = []
+    heappush(open_set, (0, start))
+
+    came_from = {}
+    g_score = {start: 0}
+    f_score = {start: heuristic(start, goal)}
+
+    while open_set:
+        current = heappop(open_set)[1]
+
+        if current == goal:
+            path = []
+            while current in came_from:
+                path.append(current)
+                current = came_from[current]
+            path.append(start)
+            return path[::-1]
+
+        for neighbor_x, neighbor_y, move_cost in battle_map.get_neighbors(*current):
+            neighbor = (neighbor_x, neighbor_y)
+            tentative_g = g_score[current] + move_cost
+
+            if neighbor not in g_score or tentative_g < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g
+                f_score[neighbor] = tentative_g + heuristic(neighbor, goal)
+                heappush(open_set, (f_score[neighbor], neighbor))
+
+    return []
+
+
+def random_queries(battle_map: Map, count, max_dist, seed):
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        sx, sy = rng.randrange(battle_map.width), rng.randrange(battle_map.height)
+        gx = min(max(sx + rng.randint(-max_dist, max_dist), 0), battle_map.width - 1)
+        gy = min(max(sy + rng.randint(-max_dist, max_dist), 0), battle_map.height - 1)
+        if battle_map.is_passable(gx, gy):
+            queries.append(((sx, sy), (gx, gy)))
+    return queries
+
+
+def run(name, func, battle_map, queries):
+    t0 = time.perf_counter()
+    paths = [func(battle_map, start, goal) for start, goal in queries]
+    elapsed = time.perf_counter() - t0
+    print(f"{name:<24}: {len(queries) / elapsed:8.2f} paths/s  ({elapsed * 1000 / len(queries):8.1f} ms/path)")
+    return paths, elapsed
+
+
+def path_cost(battle_map: Map, path):
+    """경로 비용 (A* 와 같은 비용 모델: 진입 셀 비용 x 1.0 / 대각선 1.15)"""
+    total = 0.0
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        total += battle_map.cost_map[y1, x1] * (1.15 if x0 != x1 and y0 != y1 else 1.0)
+    return total
+
+
+def compare_hpa(battle_map: Map, queries, astar_paths):
+    """먼 질의만 골라 HPA* 경로 비용 / A* 경로 비용 비교"""
+    far = [(q, p) for q, p in zip(queries, astar_paths)
+           if p and math.dist(q[0], q[1]) >= HPA_MIN_DISTANCE]
+    if not far:
+        print("hpa: no queries longer than", HPA_MIN_DISTANCE, "cells")
+        return
+    far_queries = [q for q, _ in far]
+
+    t0 = time.perf_counter()
+    hpa = HierarchicalPathfinder(battle_map)
+    print(f"{'hpa build':<24}: {(time.perf_counter() - t0) * 1000:8.1f} ms  ({len(hpa.node_cells)} entrance nodes)")
+
+    # 첫 질의들은 클러스터 내부 간선 계산 비용 포함 (cold), 이후 앞부분만 세밀화 (warm)
+    full_paths, _ = run("hpa (full, cold)", lambda m, s, g: hpa.find_path(s, g, None), battle_map, far_queries)
+    run("hpa (prefix, warm)", lambda m, s, g: hpa.find_path(s, g), battle_map, far_queries)
+
+    ratios = [path_cost(battle_map, h) / path_cost(battle_map, p)
+              for h, (_, p) in zip(full_paths, far) if h]
+    print(f"{'hpa / astar path cost':<24}: mean {sum(ratios) / len(ratios):.4f}  max {max(ratios):.4f}"
+          f"  ({len(ratios)}/{len(far)} found)")
+
+
+def count_expansions(func, battle_map, queries):
+    """A* 가 힙에서 꺼낸 항목 수 (확장 셀 수, 오래된 항목 포함)"""
+    pops = 0
+    heappop_orig = modules.map.heappop
+
+    def counting_heappop(heap):
+        nonlocal pops
+        pops += 1
+        return heappop_orig(heap)
+
+    modules.map.heappop = counting_heappop
+    try:
+        for start, goal in queries:
+            func(battle_map, start, goal)
+    finally:
+        modules.map.heappop = heappop_orig
+    return pops
+
+
+def compare_landmarks(battle_map: Map, queries, astar_paths, optimal_checks=5):
+    """ALT (랜드마크) 휴리스틱 A* vs 유클리드 휴리스틱 A*"""
+    t0 = time.perf_counter()
+    landmarks = LandmarkSet(battle_map)
+    print(f"{'landmark build/load':<24}: {(time.perf_counter() - t0) * 1000:8.1f} ms  ({len(landmarks.landmarks)} landmarks)")
+
+    def alt(m, s, g):
+        return astar_pathfinding(m, s, g, landmarks=landmarks)
+
+    alt_paths, _ = run("astar (landmarks)", alt, battle_map, queries)
+    euclid_pops = count_expansions(astar_pathfinding, battle_map, queries)
+    alt_pops = count_expansions(alt, battle_map, queries)
+    print(f"{'expansions':<24}: euclidean {euclid_pops}  landmarks {alt_pops}  ({euclid_pops / alt_pops:.2f} x fewer)")
+
+    pairs = [(a, e) for a, e in zip(alt_paths, astar_paths) if a and e]
+    ratios = [path_cost(battle_map, a) / path_cost(battle_map, e) for a, e in pairs]
+    print(f"{'landmarks / euclid cost':<24}: mean {sum(ratios) / len(ratios):.4f}  min {min(ratios):.4f}")
+
+    # 최적성: 출발 셀 거리장 값과 비교 (유클리드 휴리스틱은 대각선 1.15 가중치와 min_cost 0.1 때문에 과대 추정)
+    worst = 0.0
+    for (start, goal), path in list(zip(queries, alt_paths))[:optimal_checks]:
+        if path:
+            optimal = build_distance_field(battle_map, start)[goal[1], goal[0]]
+            worst = max(worst, abs(path_cost(battle_map, path) - optimal))
+    print(f"{'landmarks vs optimal':<24}: max |cost diff| {worst:.2e} over {optimal_checks} queries")
+
+
+def main(args):
+    battle_map = Map(args.map)
+    queries = random_queries(battle_map, args.queries, args.max_dist, args.seed)
+
+    battle_map.get_path_grid()  # 격자 준비 비용은 제외
+    fast_paths, t_fast = run("astar_pathfinding", astar_pathfinding, battle_map, queries)
+    if args.hpa:
+        compare_hpa(battle_map, queries, fast_paths)
+    if args.landmarks:
+        compare_landmarks(battle_map, queries, fast_paths)
+    if args.skip_reference:
+        return
+
+    ref_paths, t_ref = run("dict reference", astar_pathfinding_dict, battle_map, queries)
+    same = fast_paths == ref_paths
+    print(f"{'speedup':<24}: {t_ref / t_fast:8.2f} x  (identical paths: {same})")
+    if not same:
+        raise SystemExit("path mismatch between reference and array A*")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--map", type=str, default="map/golan_full_dataset_cropped.npz", help="Terrain dataset (.npz)")
+    parser.add_argument("--queries", type=int, default=20, help="Number of random start/goal pairs")
+    parser.add_argument("--max_dist", type=int, default=250, help="Max |dx|, |dy| between start and goal (cells)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the queries")
+    parser.add_argument("--skip_reference", type=bool, default=False, help="Only time astar_pathfinding")
+    parser.add_argument("--hpa", type=bool, default=False, help="Also compare HPA* on queries longer than HPA_MIN_DISTANCE")
+    parser.add_argument("--landmarks", type=bool, default=False, help="Also compare the landmark (ALT) heuristic: speed, expansions, path cost")
+
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,158 @@
+# bench_flow_field.py
+#
+# 목표 셀 하나당 거리장 / 플로우 필드 생성 시간 측정.
+# build_distance_field 의 각 method 결과가 기준(heap)과 비트 단위로 같은지,
+# 배열 연산 방향 계산(build_flow_directions)이 기존 셀 단위 루프와 같은지도 확인한다.
+#
+#   python -m benchmarks.bench_flow_field              (저장소 루트에서 실행)
+#   python -m benchmarks.bench_flow_field --goals 5 --skip_reference True
+
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from modules.map import Map, build_distance_field, build_flow_field, build_flow_directions, DISTANCE_FIELD_METHODS
+
+
+def flow_directions_loop(distance_field, goal):
+    """기존 셀 단위 방향 계산 (build_flow_field 의 이전 구현) — 비교 기준"""
+    h, w = distance_field.shape
+    flow_field = np.zeros((h, w, 2), dtype=float)
+    goal_x, goal_y = goal
+
+    # 🟢 개선된 방향 계산 - 더 부드러운 방향 벡터
+    for y in range(h):
+        for x in range(w):
+            if distance_field[y, x] == np.inf:
+                continue
+            
+            # # 🟢 그래디언트 기반 방향 계산 (더 부드러움)
+            # grad_x, grad_y = 0, 0
+            
+            # 🎯 핵심 수정: 목적지로의 직선 방향을 우선 고려
+            direct_dx = goal_x - x
+            direct_dy = goal_y - y
+            direct_dist = math.sqrt(direct_dx**2 + direct_dy**2)
+
+            if direct_dist == 0:
+                continue
+
+            # 직선 방향 단위 벡터
+            direct_ux = direct_dx / direct_dist
+            direct_uy = direct_dy / direct_dist
+            
+            # 🔧 그래디언트 기반 방향 계산
+            grad_x, grad_y = 0, 0
+            weight_sum = 0
+
+            # 주변 8방향의 거리 차이로 그래디언트 계산
+            for dx in [-1, 0, 1]:
+                for dy in [-1, 0, 1]:
+                    if dx == 0 and dy == 0:
+                        continue
+                    
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < w and 0 <= ny < h:
+                        if distance_field[ny, nx] < distance_field[y, x]:
+                            weight = 1.0 / max(1, abs(dx) + abs(dy))  # 대각선은 가중치 낮춤
+                            grad_x += dx * weight
+                            grad_y += dy * weight
+                            weight_sum += weight
+
+            # # 방향 벡터 정규화
+            # if grad_x != 0 or grad_y != 0:
+            #     length = math.sqrt(grad_x**2 + grad_y**2)
+            #     flow_field[y, x] = [grad_x/length, grad_y/length]
+
+            # 그래디언트 방향 계산
+            if weight_sum > 0:
+                grad_x /= weight_sum
+                grad_y /= weight_sum
+                grad_length = math.sqrt(grad_x**2 + grad_y**2)
+                
+                if grad_length > 0:
+                    grad_ux = grad_x / grad_length
+                    grad_uy = grad_y / grad_length
+                    
+                    # 🎯 핵심 수정: 직선 방향과 그래디언트 방향을 혼합
+                    # 직선 방향에 70% 가중치, 그래디언트 방향에 30% 가중치
+                    final_x = direct_ux * 0.7 + grad_ux * 0.3
+                    final_y = direct_uy * 0.7 + grad_uy * 0.3
+                    
+                    # 최종 방향 정규화
+                    final_length = math.sqrt(final_x**2 + final_y**2)
+                    if final_length > 0:
+                        flow_field[y, x] = [final_x/final_length, final_y/final_length]
+                    else:
+                        flow_field[y, x] = [direct_ux, direct_uy]
+                else:
+                    # 그래디언트를 계산할 수 없으면 직선 방향 사용
+                    flow_field[y, x] = [direct_ux, direct_uy]
+            else:
+                # 그래디언트를 계산할 수 없으면 직선 방향 사용
+                flow_field[y, x] = [direct_ux, direct_uy]
+    
+    return flow_field
+
+
+def random_goals(battle_map: Map, count, seed):
+    rng = random.Random(seed)
+    goals = []
+    while len(goals) < count:
+        x, y = rng.randrange(battle_map.width), rng.randrange(battle_map.height)
+        if battle_map.is_passable(x, y):
+            goals.append((x, y))
+    return goals
+
+
+def run(name, func, goals):
+    t0 = time.perf_counter()
+    results = [func(goal) for goal in goals]
+    elapsed = time.perf_counter() - t0
+    print(f"{name:<28}: {elapsed * 1000 / len(goals):9.1f} ms/goal")
+    return results
+
+
+def main(args):
+    battle_map = Map(args.map)
+    battle_map.get_path_grid()  # 격자 준비 비용은 제외
+    goals = random_goals(battle_map, args.goals, args.seed)
+
+    methods = [m for m in DISTANCE_FIELD_METHODS if not (args.skip_reference and m == "heap")]
+    fields = {}
+    for method in methods:
+        fields[method] = run(f"distance field ({method})",
+                             lambda goal: build_distance_field(battle_map, goal, method), goals)
+
+    run("build_flow_field (bucket)", lambda goal: build_flow_field(battle_map, goal, "bucket"), goals)
+
+    pairs = list(zip(fields["bucket"], goals))
+    fast = run("directions (numpy)", lambda pair: build_flow_directions(*pair), pairs)
+    if not args.skip_reference:
+        loop = run("directions (loop)", lambda pair: flow_directions_loop(*pair), pairs)
+        exact = all(np.array_equal(a, b) for a, b in zip(loop, fast))
+        close = all(np.allclose(a, b, rtol=0, atol=1e-12) for a, b in zip(loop, fast))
+        print(f"{'directions numpy == loop':<28}: {exact}  (allclose: {close})")
+        if not close:
+            raise SystemExit("flow direction mismatch")
+
+    if "heap" in fields:
+        for method in [m for m in methods if m != "heap"]:
+            same = all(np.array_equal(a, b) for a, b in zip(fields["heap"], fields[method]))
+            print(f"{method + ' == heap':<28}: {same}")
+            if not same:
+                raise SystemExit(f"distance field mismatch: {method}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--map", type=str, default="map/golan_full_dataset_cropped.npz", help="Terrain dataset (.npz)")
+    parser.add_argument("--goals", type=int, default=3, help="Number of random goal cells")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the goals")
+    parser.add_argument("--skip_reference", type=bool, default=False, help="Skip the heap Dijkstra reference")
+
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,73 @@
+# bench_map_startup.py
+#
+# Map() 시작 비용 측정 — 기존 셀 단위 반복문 build_cost_map 과
+# NumPy 배열 연산 버전, 지형 캐시(mmap) 사용 여부를 비교한다.
+#
+#   python -m benchmarks.bench_map_startup            (저장소 루트에서 실행)
+#   python -m benchmarks.bench_map_startup --repeat 5
+
+import argparse
+import time
+
+import numpy as np
+
+from modules.map import Map
+
+
+def build_cost_map_loop(battle_map: Map, slope_weight=0.1, min_cost=0.1):
+    """기존 구현 (셀 단위 반복문) — 비교 기준"""
+    h, w = battle_map.slope_arr.shape
+    cost_map = np.zeros((h, w), dtype=float)
+
+    for i in range(h):
+        for j in range(w):
+            terrain_type = battle_map.grid[i, j]
+            base_cost = battle_map.terrain_cost.get(terrain_type, 1.0)
+
+            if base_cost == np.inf:
+                cost_map[i, j] = np.inf
+            else:
+                slope = float(battle_map.slope_arr[i, j])
+                slope_cost = 1.0 + slope * slope_weight
+                cost_map[i, j] = max(min_cost, base_cost * slope_cost)
+
+    return cost_map
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main(args):
+    t_map, battle_map = best_of(lambda: Map(args.map, use_cache=False), args.repeat)
+    print(f"Map() (no cache)         : {t_map * 1000:9.1f} ms  (shape {battle_map.dem_arr.shape})")
+
+    Map(args.map)  # 캐시가 없으면 여기서 생성
+    t_cached, _ = best_of(lambda: Map(args.map), args.repeat)
+    print(f"Map() (terrain cache)    : {t_cached * 1000:9.1f} ms")
+
+    t_vec, cost_vec = best_of(battle_map.build_cost_map, args.repeat)
+    print(f"build_cost_map (numpy)   : {t_vec * 1000:9.1f} ms")
+
+    t_loop, cost_loop = best_of(lambda: build_cost_map_loop(battle_map), 1)
+    print(f"build_cost_map (loop)    : {t_loop * 1000:9.1f} ms")
+
+    same = np.array_equal(cost_vec, cost_loop)
+    print(f"speedup                  : {t_loop / t_vec:9.1f} x  (identical: {same})")
+    if not same:
+        raise SystemExit("cost_map mismatch between loop and numpy implementations")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--map", type=str, default="map/golan_full_dataset_cropped.npz", help="Terrain dataset (.npz)")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of repetitions (best time reported)")
+
+    args = parser.parse_args()
+    main(args)
@@ -6,10 +6,14 @@ import signal
 import argparse
 
 from modules.history import History
+from modules.landmarks import get_landmarks
+from modules.road_graph import get_road_graph
 from modules.map import Map, Coord, TIME_STEP
+from modules.path_service import PathService
 from modules.placement import PLACEMENT, grid_sample_no_overlap
 from modules.timeline import TIMELINE
 from modules.troop import Troop, TroopList, terminate
+from modules.troop_store import TroopStore
 from modules.troop import update_troop_location_improved
 from modules.utils import initialize_folders
 
@@ -21,12 +25,14 @@ terminate_flag = False
 active_on   = set()   # 현재 “활성화” 된 (team,phase) 쌍
 move_on     = set()   # 현재 “이동 허용” 된 (team,phase) 쌍
 
-def create_from_positions(unit_positions):
+def create_from_positions(unit_positions, store=None):
     troops = []
     for team, affs in unit_positions.items():
         for affiliation, feat in affs.items():
             phase = feat['phase']
             dest  = feat.get('goals', None)
+            # 목적지 구역 ((x0, x1), (y0, y1)) — 같은 구역으로 가는 부대는 플로우 필드 공유
+            dest_region = tuple(tuple(r) for r in feat['dest']) if 'dest' in feat else None
             
             # comp별로 리스트를 늘려서, locs와 1:1 매칭할 준비
             comp_list = []
@@ -51,7 +57,7 @@ def create_from_positions(unit_positions):
                     fixed_dest = Coord(dest_x, dest_y, dest_z)
                 
                 t = Troop(comp, Coord(x, y, z), affiliation=affiliation, phase=phase,
-                          fixed_dest=fixed_dest)
+                          fixed_dest=fixed_dest, dest_region=dest_region, store=store)
                 troops.append(t)
     return troops
 
@@ -104,8 +110,10 @@ def main(args):
     hist_record_time = 0.0
     img_save_interval = 0.0  # Save every 1 minute
     history = History(time=current_time)
-    battle_map = Map() # Create a map
+    battle_map = Map(flow_cache_bytes=args.flow_cache_mb << 20,
+                     viewshed_cache_bytes=args.viewshed_cache_mb << 20) # Create a map
     print("Map Size", battle_map.dem_arr.shape)
+    print("Road graph:", get_road_graph(battle_map).info())  # road_mask 중심선 -> 교차로 / 도로 구간 그래프
 
     timeline_index = 0
 
@@ -153,8 +161,33 @@ def main(args):
                 ]
                 feat['goals'].extend(goals_xyz)
 
-    spawned_troops = create_from_positions(PLACEMENT)
-    troop_list = TroopList(troop_list = spawned_troops)
+    if args.landmarks:
+        # A* 휴리스틱용 랜드마크 거리장 (지형 필드 저장소에 있으면 로드만)
+        print("Loading landmark distance fields...")
+        get_landmarks(battle_map)
+
+    store = TroopStore()  # 이번 실행의 부대 상태 열 저장소
+    spawned_troops = create_from_positions(PLACEMENT, store)
+    troop_list = TroopList(troop_list = spawned_troops, store = store)
+    troop_list.path_queue.budget_ms = args.path_budget_ms
+    if args.path_workers > 0:
+        # 먼 거리 경로 / 플로우 필드 생성을 워커 프로세스에서 (결과는 다음 틱에 적용)
+        troop_list.path_queue.service = PathService(battle_map, args.path_workers)
+
+    # 목적지 구역별 플로우 필드 (전차/장갑차용) 를 시나리오 로드 시 한 번만 생성
+    regions = {t.dest_region for t in spawned_troops
+               if t.dest_region and t.should_use_flow_field(battle_map)}
+    print(f"Building {len(regions)} goal-region flow fields...")
+    for region in regions:
+        battle_map.get_region_flow_field(region)
+
+    if args.precompute_viewsheds:
+        # PLACEMENT 배치 셀마다 관측 범위 내 뷰쉐드를 미리 계산
+        print("Precomputing viewsheds...")
+        battle_map.precompute_viewsheds(
+            [(t.coord.x, t.coord.y) for t in spawned_troops],
+            [t.get_observation_range() * 100 + 2 for t in spawned_troops],  # km -> 픽셀 (+반올림 여유)
+        )
 
     # assign_target_all(current_time, troop_list)
     history.init_status_data(troop_list, battle_map.reference_altitude, battle_map.height)
@@ -188,6 +221,14 @@ def main(args):
             history.save_battle_log(res_loc)
             history.save_status_data(res_loc)
             print("Simulation terminated.")
+            print("LOS cache:", battle_map.los_cache_info())
+            print("Flow field cache:", battle_map.flow_fields.info())
+            print("Path cache:", battle_map.path_cache.info())
+            print("Path queue:", troop_list.path_queue.info())
+            print("Observation pair checks:", troop_list.observation_checks)
+            if troop_list.path_queue.service is not None:
+                print("Path service:", troop_list.path_queue.service.info())
+                troop_list.path_queue.service.close()
             history.plot_team_strength_over_time(res_loc, args.plot)
             break
 
@@ -232,6 +273,12 @@ if __name__ == "__main__":
     parser.add_argument("--plot", type=bool, default=True, help="Plot the team strength over time at the end of simulation")
     parser.add_argument("--save_frames", type=bool, default=False, help="Save frames during simulation (slow down)")
     parser.add_argument("--save_tactics", type=bool, default=True, help="Save tactical overview frames during simulation")
+    parser.add_argument("--flow_cache_mb", type=int, default=128, help="Memory budget (MB) for cached flow fields, least recently used goals are dropped first")
+    parser.add_argument("--viewshed_cache_mb", type=int, default=128, help="Memory budget (MB) for cached viewsheds (about 0.5 MB each), least recently used observer cells are dropped first")
+    parser.add_argument("--path_budget_ms", type=float, default=0.0, help="Per-tick pathfinding budget in ms, queued units move straight until their path is computed (0: no limit, keeps seeded runs reproducible)")
+    parser.add_argument("--landmarks", type=bool, default=True, help="Use landmark (ALT) lower bounds as the A* heuristic, distance fields are built once per cost map and stored on disk")
+    parser.add_argument("--path_workers", type=int, default=0, help="Worker processes for long-range paths and flow fields, results are applied one tick later (0: compute in the main process)")
+    parser.add_argument("--precompute_viewsheds", type=bool, default=False, help="Precompute viewsheds for every placed unit before the simulation starts (slow startup)")
 
     args = parser.parse_args()
     main(args)
@@ -0,0 +1,216 @@
+# dstar_lite.py
+
+import math
+from heapq import heappush, heappop
+from typing import List, Tuple
+
+from .map import Map
+
+
+DSTAR_MAX_EXPANSIONS = 400_000  # 한 번의 탐색/보수에서 확장할 최대 셀 수 (넘으면 실패 처리)
+
+
+class DStarLite:
+    """D* Lite 증분 경로 계획기 (부대 1개 = 목표 1개)
+
+    goal 에서 start 방향으로 거꾸로 탐색하고 g / rhs 값을 호출 사이에 유지한다.
+    - start 가 움직이면 km 만 갱신 (이미 일관된 셀이면 추가 탐색 없음)
+    - 비용이 바뀐 셀은 Map.cost_changes 기록을 읽어 영향 받는 셀만 다시 계산
+    목표가 바뀌면 새 계획기를 만든다. 비용 모델은 astar_pathfinding 과 같다
+    (진입 셀 비용 x 거리 가중치).
+    """
+
+    def __init__(self, battle_map: Map, goal: Tuple[int, int]):
+        self.map = battle_map
+        self.grid = battle_map.get_path_grid()
+        self.goal = goal
+        self.goal_idx = self.grid.index(*goal)
+        self.start_idx = None
+        self.last_idx = None
+        self.km = 0.0
+        self.cost_version = battle_map.cost_version
+
+        self.g = {}
+        self.rhs = {self.goal_idx: 0.0}
+        self.open_set = []
+        self.open_key = {}  # idx -> 현재 유효한 key (힙의 나머지 항목은 지연 삭제)
+        self.expansions = 0
+
+    # ---- 기본 연산 ----
+    def heuristic(self, a, b) -> float:
+        ay, ax = divmod(a, self.grid.width)
+        by, bx = divmod(b, self.grid.width)
+        return math.sqrt((ax - bx)**2 + (ay - by)**2)
+
+    def calculate_key(self, idx):
+        m = min(self.g.get(idx, math.inf), self.rhs.get(idx, math.inf))
+        return (m + self.heuristic(self.start_idx, idx) + self.km, m)
+
+    def update_vertex(self, idx):
+        if self.g.get(idx, math.inf) != self.rhs.get(idx, math.inf):
+            key = self.calculate_key(idx)
+            if self.open_key.get(idx) != key:
+                self.open_key[idx] = key
+                heappush(self.open_set, (key, idx))
+        else:
+            self.open_key.pop(idx, None)
+
+    def best_successor_cost(self, idx) -> float:
+        """rhs(idx) = min(c(idx, s) + g(s)) — 이웃 s 로 들어가는 비용은 s 의 셀 비용"""
+        cost = self.grid.cost_list
+        if cost[idx] == math.inf:
+            return math.inf  # 테두리/통과 불가 셀 (테두리의 이웃은 격자 밖일 수 있음)
+        g = self.g
+        best = math.inf
+        for offset, _, _, base_dist in self.grid.neighbors:
+            succ = idx + offset
+            c = cost[succ]
+            if c != math.inf:
+                value = g.get(succ, math.inf) + c * base_dist
+                if value < best:
+                    best = value
+        return best
+
+    def top_key(self):
+        # 지연 삭제된 항목 정리 후 최소 key
+        while self.open_set:
+            key, idx = self.open_set[0]
+            if self.open_key.get(idx) == key:
+                return key
+            heappop(self.open_set)
+        return (math.inf, math.inf)
+
+    def compute_shortest_path(self) -> bool:
+        cost = self.grid.cost_list
+        neighbors = self.grid.neighbors
+        g, rhs = self.g, self.rhs
+        start = self.start_idx
+        budget = DSTAR_MAX_EXPANSIONS
+
+        while (self.top_key() < self.calculate_key(start)
+               or rhs.get(start, math.inf) != g.get(start, math.inf)):
+            if budget == 0 or not self.open_set:
+                return False
+            budget -= 1
+            self.expansions += 1
+
+            key_old, u = heappop(self.open_set)
+            key_new = self.calculate_key(u)
+            if key_old < key_new:
+                self.open_key[u] = key_new
+                heappush(self.open_set, (key_new, u))
+                continue
+            del self.open_key[u]
+
+            g_old = g.get(u, math.inf)
+            rhs_u = rhs.get(u, math.inf)
+            c_u = cost[u]
+            if g_old > rhs_u:
+                # 과대 일관성: g 확정 후 선행 셀(u 로 들어오는 이웃)의 rhs 완화
+                g[u] = rhs_u
+                if c_u == math.inf:
+                    continue
+                for offset, _, _, base_dist in neighbors:
+                    pred = u - offset
+                    if pred == self.goal_idx or cost[pred] == math.inf:
+                        continue  # 테두리/통과 불가 선행 셀은 경로에 오지 않음
+                    value = rhs_u + c_u * base_dist
+                    if value < rhs.get(pred, math.inf):
+                        rhs[pred] = value
+                        self.update_vertex(pred)
+            else:
+                # 과소 일관성: g 를 무한대로 올리고 u 와 선행 셀 rhs 재계산
+                g[u] = math.inf
+                if u != self.goal_idx:
+                    rhs[u] = self.best_successor_cost(u)
+                self.update_vertex(u)
+                if c_u == math.inf:
+                    continue
+                for offset, _, _, base_dist in neighbors:
+                    pred = u - offset
+                    if pred == self.goal_idx or cost[pred] == math.inf:
+                        continue  # 테두리/통과 불가 선행 셀은 경로에 오지 않음
+                    if rhs.get(pred, math.inf) == g_old + c_u * base_dist:
+                        rhs[pred] = self.best_successor_cost(pred)
+                        self.update_vertex(pred)
+        return True
+
+    # ---- 비용 변경 반영 ----
+    def apply_cost_changes(self):
+        """마지막 계획 이후 Map.set_cell_cost 로 바뀐 셀들의 진입 간선 갱신"""
+        changes = self.map.cost_changes_since(self.cost_version)
+        self.cost_version = self.map.cost_version
+        if not changes:
+            return
+
+        self.km += self.heuristic(self.last_idx, self.start_idx)
+        self.last_idx = self.start_idx
+
+        rhs, g = self.rhs, self.g
+        cost = self.grid.cost_list
+        for (x, y), (old_cost, new_cost) in changes.items():
+            v = self.grid.index(x, y)
+            if old_cost == math.inf and v != self.goal_idx:
+                # 통과 불가였던 셀은 rhs 를 계산한 적이 없으므로 새로 계산
+                rhs[v] = self.best_successor_cost(v)
+                self.update_vertex(v)
+            g_v = g.get(v, math.inf)
+            for offset, _, _, base_dist in self.grid.neighbors:
+                u = v - offset
+                if u == self.goal_idx or cost[u] == math.inf:
+                    continue  # 테두리/통과 불가 선행 셀은 경로에 오지 않음
+                c_old, c_new = old_cost * base_dist, new_cost * base_dist
+                if c_old > c_new:
+                    if c_new + g_v < rhs.get(u, math.inf):
+                        rhs[u] = c_new + g_v
+                elif rhs.get(u, math.inf) == c_old + g_v:
+                    rhs[u] = self.best_successor_cost(u)
+                self.update_vertex(u)
+
+    # ---- 질의 ----
+    def plan(self, start: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """현재 위치에서 goal 까지 경로 (start 포함). 실패하면 []"""
+        grid = self.grid
+        if not grid.contains(*start) or not self.map.is_reachable(start, self.goal):
+            return []
+        start_idx = grid.index(*start)
+
+        if self.start_idx is None:
+            self.start_idx = self.last_idx = start_idx
+            self.update_vertex(self.goal_idx)
+        elif start_idx != self.start_idx:
+            # start 이동: km 에 이동 거리만큼 누적 (key 재정렬 없이 하한 유지)
+            self.km += self.heuristic(self.last_idx, start_idx)
+            self.start_idx = self.last_idx = start_idx
+
+        self.apply_cost_changes()
+        if not self.compute_shortest_path():
+            return []
+        return self.extract_path()
+
+    def extract_path(self) -> List[Tuple[int, int]]:
+        """start 에서 c(s, s') + g(s') 가 최소인 이웃을 따라 goal 까지"""
+        cost = self.grid.cost_list
+        g = self.g
+        current = self.start_idx
+        if g.get(current, math.inf) == math.inf:
+            return []
+
+        path = [self.grid.coord(current)]
+        visited = {current}
+        while current != self.goal_idx:
+            best, best_value = None, math.inf
+            for offset, _, _, base_dist in self.grid.neighbors:
+                succ = current + offset
+                c = cost[succ]
+                if c == math.inf:
+                    continue
+                value = g.get(succ, math.inf) + c * base_dist
+                if value < best_value:
+                    best, best_value = succ, value
+            if best is None or best in visited:
+                return []  # 아직 일관되지 않은 영역 — 호출 측에서 전체 재탐색
+            visited.add(best)
+            path.append(self.grid.coord(best))
+            current = best
+        return path
@@ -0,0 +1,110 @@
+# engagement.py
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .troop_store import TroopStore, TEAM_CODES
+
+
+class EngagementMatrix:
+    """틱 단위 blue x red 거리 행렬과 사격/관측 사거리 마스크
+
+    이동이 끝난 뒤 한 번 TroopStore 좌표 열에서 만들고, 같은 틱 안의 거리 조회
+    (관측, 표적 할당, 사격) 는 다시 계산하지 않고 이 행렬을 읽는다.
+    - distance[i, j]: blue i 와 red j 사이 3차원 거리 (km, Troop.get_distance 와 같은 식, float64)
+    - blue_fire[i, j] / red_fire[i, j]: 사격 측 range_km (BLUE_RANGE_BUFF 포함) 이내
+    - blue_sees[i, j] / red_sees[i, j]: 관측 측 관측 범위 (blue 는 blue_obs_buff 배) 이내
+    i, j 는 팀 안의 순번이며 행 번호와는 self.index 로 변환한다. 좌표가 바뀌면 다시 만들어야 한다.
+    """
+
+    def __init__(self, store: TroopStore, blue_rows, red_rows, blue_obs_buff=1.0):
+        self.store = store
+        self.blue_rows = np.sort(np.asarray(blue_rows, dtype=np.int64))  # 행 번호 순
+        self.red_rows = np.sort(np.asarray(red_rows, dtype=np.int64))
+        self.index = np.full(store.size, -1, dtype=np.int64)  # 행 -> 팀 안의 순번
+        self.index[self.blue_rows] = np.arange(len(self.blue_rows))
+        self.index[self.red_rows] = np.arange(len(self.red_rows))
+        self.team = store.team[:store.size]
+
+        b, r = self.blue_rows, self.red_rows
+        dx = store.x[b][:, None] - store.x[r][None, :]
+        dy = store.y[b][:, None] - store.y[r][None, :]
+        z = store.z.astype(np.float64)  # 고도 열은 float32, 거리는 float64 로 계산
+        dz = z[b][:, None] - z[r][None, :]
+        self.distance = np.sqrt(dx * dx + dy * dy + dz * dz) * 0.01
+
+        blue_range, red_range = store.range_km[b], store.range_km[r]
+        self.blue_fire = self.distance <= blue_range[:, None]
+        self.red_fire = self.distance <= red_range[None, :]
+        self.blue_sees = self.distance <= (blue_range * blue_obs_buff)[:, None]
+        self.red_sees = self.distance <= red_range[None, :]
+
+    def _is_blue(self, troop) -> bool:
+        return self.team[troop.row] == TEAM_CODES["blue"]
+
+    def _pair(self, a, b):
+        """(blue 순번, red 순번), 같은 팀이거나 행렬 밖이면 None"""
+        if a.row >= len(self.index) or b.row >= len(self.index):
+            return None
+        i, j = self.index[a.row], self.index[b.row]
+        if i < 0 or j < 0 or self.team[a.row] == self.team[b.row]:
+            return None
+        return (i, j) if self._is_blue(a) else (j, i)
+
+    def get(self, a, b) -> Optional[float]:
+        """a, b 사이 거리 (km), 행렬에 없는 쌍이면 None"""
+        pair = self._pair(a, b)
+        return None if pair is None else self.distance.item(pair)
+
+    def can_fire(self, shooter, target) -> Optional[bool]:
+        """target 이 shooter 의 사거리 안인지, 행렬에 없는 쌍이면 None"""
+        pair = self._pair(shooter, target)
+        if pair is None:
+            return None
+        return (self.blue_fire if self._is_blue(shooter) else self.red_fire).item(pair)
+
+    def enemies_in_range(self, troop, observe=False) -> Tuple[np.ndarray, np.ndarray]:
+        """troop 의 사거리 (observe=True 면 관측 범위) 안에 있는 적의 행 번호와 거리 (km), 행 번호 순"""
+        i = self.index[troop.row]
+        if self._is_blue(troop):
+            mask = (self.blue_sees if observe else self.blue_fire)[i]
+            return self.red_rows[mask], self.distance[i][mask]
+        mask = (self.red_sees if observe else self.red_fire)[:, i]
+        return self.blue_rows[mask], self.distance[:, i][mask]
+
+    def distances_from(self, troop) -> np.ndarray:
+        """troop 에서 모든 행까지의 거리 (적 행만 채워지고 나머지는 inf)"""
+        distances = np.full(len(self.index), np.inf)
+        i = self.index[troop.row]
+        if self._is_blue(troop):
+            distances[self.red_rows] = self.distance[i]
+        else:
+            distances[self.blue_rows] = self.distance[:, i]
+        return distances
+
+    def observation_candidates(self, live: np.ndarray, dirty: np.ndarray = None,
+                               observed: np.ndarray = None) -> dict:
+        """관측 판정이 필요한 {관측자 행: 관측 범위 안의 살아 있는 적 행 배열 (행 번호 순)}
+
+        dirty (행별 bool) 를 주면 관측자나 적 중 하나라도 바뀐 쌍만 남긴다.
+        observed (행별 bool) 에 표시된 적은 이미 관측됐으므로 뺀다. 후보가 없는 관측자는 빠진다.
+        """
+        b, r = self.blue_rows, self.red_rows
+        both_live = live[b][:, None] & live[r][None, :]
+        blue_pairs = self.blue_sees & both_live
+        red_pairs = self.red_sees & both_live
+        if observed is not None:
+            blue_pairs &= ~observed[r][None, :]
+            red_pairs &= ~observed[b][:, None]
+        if dirty is not None:
+            changed = dirty[b][:, None] | dirty[r][None, :]
+            blue_pairs &= changed
+            red_pairs &= changed
+
+        candidates = {}
+        for i in np.flatnonzero(blue_pairs.any(axis=1)).tolist():
+            candidates[b.item(i)] = r[blue_pairs[i]]
+        for j in np.flatnonzero(red_pairs.any(axis=0)).tolist():
+            candidates[r.item(j)] = b[red_pairs[:, j]]
+        return candidates
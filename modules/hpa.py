@@ -0,0 +1,290 @@
+# hpa.py
+
+import math
+from heapq import heappush, heappop
+from typing import List, Tuple
+
+import numpy as np
+
+from .map import Map, NEIGHBOR_STEPS
+
+
+HPA_CLUSTER_SIZE = 32  # 클러스터 한 변 (셀)
+HPA_MIN_DISTANCE = 64  # 이 거리(셀) 이상인 질의만 추상 그래프 사용
+HPA_REFINE_EDGES = 8  # 현재 위치에서부터 세밀화할 추상 간선 수
+HPA_MAX_ENTRANCE_WIDTH = 6  # 이보다 넓은 입구 구간은 양 끝 + 가운데에 입구 노드 3개
+
+
+class HierarchicalPathfinder:
+    """HPA* (Hierarchical Path-Finding A*) 추상 그래프
+
+    - 지형을 cluster_size x cluster_size 클러스터로 나눈다
+    - 인접 클러스터 경계에서 양쪽 모두 통과 가능한 구간마다 입구(entrance) 노드를 둔다
+    - 클러스터 내부 입구 노드 간 비용은 해당 클러스터가 처음 탐색될 때 계산해서 보관한다
+    긴 질의는 추상 그래프에서 풀고, 유닛 현재 위치 근처 구간만 셀 단위 경로로 세밀화한다.
+    """
+
+    def __init__(self, battle_map: Map, cluster_size=HPA_CLUSTER_SIZE):
+        self.map = battle_map
+        self.cluster_size = cluster_size
+        self.cost_map = np.asarray(battle_map.cost_map)
+        self.height, self.width = self.cost_map.shape
+        self.clusters_x = -(-self.width // cluster_size)
+        self.clusters_y = -(-self.height // cluster_size)
+
+        self.node_cells = []  # node id -> (x, y)
+        self.node_of_cell = {}  # (x, y) -> node id
+        self.cluster_nodes = {}  # (cx, cy) -> [node id]
+        self.inter_edges = []  # node id -> [(node id, cost)] (클러스터 간 간선)
+        self._intra = {}  # (cx, cy) -> (node 목록, 거리 배열, {node: [(node, cost)]})
+
+        self.build_entrances()
+
+    # ---- 그래프 구성 ----
+    def cluster_of(self, x, y) -> Tuple[int, int]:
+        return (x // self.cluster_size, y // self.cluster_size)
+
+    def cluster_bounds(self, cluster):
+        cx, cy = cluster
+        x0, y0 = cx * self.cluster_size, cy * self.cluster_size
+        return x0, y0, min(self.width, x0 + self.cluster_size), min(self.height, y0 + self.cluster_size)
+
+    def _add_node(self, x, y) -> int:
+        cell = (x, y)
+        if cell in self.node_of_cell:
+            return self.node_of_cell[cell]
+        node = len(self.node_cells)
+        self.node_cells.append(cell)
+        self.node_of_cell[cell] = node
+        self.cluster_nodes.setdefault(self.cluster_of(x, y), []).append(node)
+        self.inter_edges.append([])
+        return node
+
+    def _add_transition(self, a, b):
+        """경계를 사이에 둔 두 셀 a, b 를 입구 노드로 등록하고 양방향 간선 추가 (진입 셀 비용)"""
+        na, nb = self._add_node(*a), self._add_node(*b)
+        self.inter_edges[na].append((nb, float(self.cost_map[b[1], b[0]])))
+        self.inter_edges[nb].append((na, float(self.cost_map[a[1], a[0]])))
+
+    def build_entrances(self):
+        """인접 클러스터 경계마다 통과 가능한 연속 구간을 찾아 입구 노드 생성"""
+        passable = np.isfinite(self.cost_map)
+        size = self.cluster_size
+
+        # 세로 경계 (cx | cx+1)
+        for cx in range(self.clusters_x - 1):
+            xa = (cx + 1) * size - 1
+            open_rows = passable[:, xa] & passable[:, xa + 1]
+            for cy in range(self.clusters_y):
+                y0, y1 = cy * size, min(self.height, (cy + 1) * size)
+                for lo, hi in _runs(open_rows[y0:y1]):
+                    for y in _entrance_positions(y0 + lo, y0 + hi):
+                        self._add_transition((xa, y), (xa + 1, y))
+
+        # 가로 경계 (cy / cy+1)
+        for cy in range(self.clusters_y - 1):
+            ya = (cy + 1) * size - 1
+            open_cols = passable[ya, :] & passable[ya + 1, :]
+            for cx in range(self.clusters_x):
+                x0, x1 = cx * size, min(self.width, (cx + 1) * size)
+                for lo, hi in _runs(open_cols[x0:x1]):
+                    for x in _entrance_positions(x0 + lo, x0 + hi):
+                        self._add_transition((x, ya), (x, ya + 1))
+
+    def cluster_distances(self, cluster, sources):
+        """클러스터 내부만 지나는 최단 거리 (sources 각각에서 모든 셀까지)
+
+        (source 수, h+2, w+2) 배열에 8방향 완화를 수렴할 때까지 반복한다 (Bellman-Ford).
+        수렴값은 같은 비용 모델의 Dijkstra 결과와 같다. 테두리는 inf (클러스터 밖 금지).
+        """
+        x0, y0, x1, y1 = self.cluster_bounds(cluster)
+        h, w = y1 - y0, x1 - x0
+        cost = self.cost_map[y0:y1, x0:x1]
+
+        dist = np.full((len(sources), h + 2, w + 2), np.inf)
+        for k, (sx, sy) in enumerate(sources):
+            dist[k, sy - y0 + 1, sx - x0 + 1] = 0.0
+        inner = dist[:, 1:-1, 1:-1]
+        step_costs = [(dx, dy, cost * base_dist) for dx, dy, base_dist in NEIGHBOR_STEPS]
+
+        for _ in range(h * w):
+            before = inner.copy()
+            for dx, dy, step_cost in step_costs:
+                # u -> v (v = u + (dx, dy)) : dist[v] = min(dist[v], dist[u] + cost[v] * base_dist)
+                np.minimum(inner, dist[:, 1 - dy:h + 1 - dy, 1 - dx:w + 1 - dx] + step_cost, out=inner)
+            if np.array_equal(before, inner):
+                break
+        return dist
+
+    def intra_edges(self, cluster):
+        """클러스터 내부 입구 노드 간 간선 (처음 요청 시 계산)"""
+        if cluster not in self._intra:
+            nodes = self.cluster_nodes.get(cluster, [])
+            x0, y0, _, _ = self.cluster_bounds(cluster)
+            dist = self.cluster_distances(cluster, [self.node_cells[n] for n in nodes])
+            edges = {}
+            for k, a in enumerate(nodes):
+                edges[a] = []
+                for b in nodes:
+                    if b == a:
+                        continue
+                    bx, by = self.node_cells[b]
+                    d = dist[k, by - y0 + 1, bx - x0 + 1]
+                    if d != np.inf:
+                        edges[a].append((b, float(d)))
+            self._intra[cluster] = (nodes, dist, edges)
+        return self._intra[cluster]
+
+    def precompute(self):
+        """모든 클러스터의 내부 간선을 미리 계산 (기본은 처음 탐색될 때 계산)"""
+        for cluster in list(self.cluster_nodes):
+            self.intra_edges(cluster)
+
+    # ---- 질의 ----
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int],
+                  refine_edges=HPA_REFINE_EDGES) -> List[Tuple[int, int]]:
+        """추상 그래프로 start -> goal 경로 탐색
+
+        refine_edges 개의 추상 간선(현재 위치 쪽)만 셀 단위 경로로 세밀화해서 반환한다.
+        None 이면 전체 경로를 세밀화. 경로가 없으면 [].
+        """
+        sx, sy = start
+        gx, gy = goal
+        if not (0 <= sx < self.width and 0 <= sy < self.height):
+            return []
+        if not self.map.is_reachable(start, goal):
+            return []
+
+        start_cluster, goal_cluster = self.cluster_of(sx, sy), self.cluster_of(gx, gy)
+
+        # 1) start: 자기 클러스터의 입구 노드까지 비용
+        start_dist = self.cluster_distances(start_cluster, [start])
+        sx0, sy0, _, _ = self.cluster_bounds(start_cluster)
+        start_edges = []
+        for n in self.cluster_nodes.get(start_cluster, []):
+            nx, ny = self.node_cells[n]
+            d = start_dist[0, ny - sy0 + 1, nx - sx0 + 1]
+            if d != np.inf:
+                start_edges.append((n, float(d)))
+
+        # 2) goal: goal 클러스터 입구 노드에서 goal 까지 비용
+        goal_nodes, goal_dist, _ = self.intra_edges(goal_cluster)
+        gx0, gy0, _, _ = self.cluster_bounds(goal_cluster)
+        goal_edges = {}
+        for k, n in enumerate(goal_nodes):
+            d = goal_dist[k, gy - gy0 + 1, gx - gx0 + 1]
+            if d != np.inf:
+                goal_edges[n] = float(d)
+        if start_cluster == goal_cluster:
+            d = start_dist[0, gy - sy0 + 1, gx - sx0 + 1]
+            if d != np.inf:
+                start_edges.append((GOAL, float(d)))
+
+        # 3) 추상 그래프 A* (격자 A* 와 같은 유클리드 휴리스틱)
+        abstract = self._search(start_edges, goal_edges, goal)
+        if not abstract:
+            return []
+
+        # 4) 앞쪽 추상 간선만 셀 단위로 세밀화
+        if refine_edges is not None:
+            abstract = abstract[:refine_edges + 1]
+        return self._refine(abstract, start, goal, start_dist)
+
+    def _search(self, start_edges, goal_edges, goal):
+        gx, gy = goal
+
+        def heuristic(node):
+            x, y = self.node_cells[node]
+            return math.sqrt((x - gx)**2 + (y - gy)**2)
+
+        g_score = {START: 0.0}
+        came_from = {}
+        open_set = [(0.0, START)]
+        while open_set:
+            _, current = heappop(open_set)
+            if current == GOAL:
+                path = [GOAL]
+                while current in came_from:
+                    current = came_from[current]
+                    path.append(current)
+                return path[::-1]
+
+            if current == START:
+                edges = start_edges
+            else:
+                edges = list(self.inter_edges[current])
+                edges += self.intra_edges(self.cluster_of(*self.node_cells[current]))[2][current]
+                if current in goal_edges:
+                    edges.append((GOAL, goal_edges[current]))
+
+            current_g = g_score[current]
+            for neighbor, cost in edges:
+                tentative_g = current_g + cost
+                if tentative_g < g_score.get(neighbor, math.inf):
+                    g_score[neighbor] = tentative_g
+                    came_from[neighbor] = current
+                    h = 0.0 if neighbor == GOAL else heuristic(neighbor)
+                    heappush(open_set, (tentative_g + h, neighbor))
+        return []
+
+    def _refine(self, abstract, start, goal, start_dist) -> List[Tuple[int, int]]:
+        """추상 경로 [START, n1, n2, ...] 를 셀 단위 경로로 변환"""
+        path = [start]
+        for a, b in zip(abstract, abstract[1:]):
+            if a == START:
+                source, cluster, dist = start, self.cluster_of(*start), start_dist[0]
+            else:
+                source = self.node_cells[a]
+                cluster = self.cluster_of(*source)
+                nodes, dists, _ = self.intra_edges(cluster)
+                dist = dists[nodes.index(a)]
+            target = goal if b == GOAL else self.node_cells[b]
+
+            if self.cluster_of(*target) != cluster:
+                path.append(target)  # 클러스터 간 간선: 한 칸 이동
+            else:
+                path.extend(self._trace(cluster, dist, source, target))
+        return path
+
+    def _trace(self, cluster, dist, source, target) -> List[Tuple[int, int]]:
+        """클러스터 거리 배열을 target 에서 source 로 거슬러 올라가 셀 경로 복원 (source 제외)"""
+        x0, y0, _, _ = self.cluster_bounds(cluster)
+        cells = []
+        x, y = target
+        while (x, y) != source:
+            cells.append((x, y))
+            here = dist[y - y0 + 1, x - x0 + 1]
+            cost = self.cost_map[y, x]
+            for dx, dy, base_dist in NEIGHBOR_STEPS:
+                px, py = x - dx, y - dy
+                if dist[py - y0 + 1, px - x0 + 1] + cost * base_dist == here:
+                    x, y = px, py
+                    break
+            else:
+                break  # 수치상 복원 불가 (발생하지 않아야 함)
+        return cells[::-1]
+
+
+START, GOAL = -1, -2  # 추상 그래프의 임시 노드
+
+
+def _runs(mask):
+    """불리언 1차원 배열에서 True 가 연속된 구간 [lo, hi) 목록"""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    change = np.flatnonzero(np.diff(padded))
+    return list(zip(change[0::2].tolist(), change[1::2].tolist()))
+
+
+def _entrance_positions(lo, hi):
+    """입구 구간 [lo, hi) 에서 입구 노드를 둘 위치 — 좁으면 가운데, 넓으면 양 끝 + 가운데"""
+    if hi - lo < HPA_MAX_ENTRANCE_WIDTH:
+        return [(lo + hi - 1) // 2]
+    return [lo, (lo + hi - 1) // 2, hi - 1]
+
+
+def hpa_pathfinding(battle_map: Map, start: Tuple[int, int], goal: Tuple[int, int],
+                    refine_edges=HPA_REFINE_EDGES) -> List[Tuple[int, int]]:
+    """HPA* 경로 탐색 — 추상 그래프는 Map 당 한 번 생성해서 재사용"""
+    if battle_map.hpa is None:
+        battle_map.hpa = HierarchicalPathfinder(battle_map)
+    return battle_map.hpa.find_path(start, goal, refine_edges)
@@ -0,0 +1,121 @@
+# landmarks.py
+
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+from .map import Map, astar_pathfinding, build_distance_field
+from .terrain_cache import load_field, save_field
+
+
+LANDMARK_COUNT = 8  # 랜드마크 수 (랜드마크마다 정/역방향 거리장 2장, 질의마다 전부 사용)
+
+
+class LandmarkSet:
+    """ALT (A*, Landmarks, Triangle inequality) 휴리스틱
+
+    랜드마크 L 마다 두 거리장을 한 번만 만든다 (같은 비용 모델, 버킷 Dijkstra).
+    - forward[L][v] = d(L -> v), reverse[L][v] = d(v -> L)
+    삼각 부등식으로 d(n -> t) >= max(d(L -> t) - d(L -> n), d(n -> L) - d(t -> L)) 이므로
+    지형 비용을 반영한 하한이 되고, A* 는 여전히 최적 경로를 찾는다.
+    랜드마크는 이미 고른 랜드마크들에서 가장 먼 셀을 차례로 고른다 (farthest-point).
+    거리장은 PathGrid 인덱스 순서(테두리 포함 1차원)로 지형 필드 저장소에 보관한다.
+    """
+
+    def __init__(self, battle_map: Map, count=LANDMARK_COUNT):
+        self.map = battle_map
+        self.grid = battle_map.get_path_grid()
+        self.landmarks = []  # [(x, y)]
+        self.forward = []  # 랜드마크별 d(L -> v), 길이 grid.size
+        self.reverse = []  # 랜드마크별 d(v -> L)
+
+        cost_hash = battle_map.cost_hash()
+        stored = load_field(battle_map.cache_dir, cost_hash, "landmarks") if battle_map.use_cache else None
+        if stored is not None and len(stored) == count:
+            for x, y in stored.tolist():
+                self.landmarks.append((x, y))
+                self.forward.append(load_field(battle_map.cache_dir, cost_hash, f"landmark_fwd_{x}_{y}"))
+                self.reverse.append(load_field(battle_map.cache_dir, cost_hash, f"landmark_rev_{x}_{y}"))
+            if all(f is not None for f in self.forward + self.reverse):
+                self._views()
+                return
+            self.landmarks, self.forward, self.reverse = [], [], []
+
+        self.select(count)
+        if battle_map.use_cache:
+            for (x, y), forward, reverse in zip(self.landmarks, self.forward, self.reverse):
+                save_field(battle_map.cache_dir, cost_hash, f"landmark_fwd_{x}_{y}", forward)
+                save_field(battle_map.cache_dir, cost_hash, f"landmark_rev_{x}_{y}", reverse)
+            save_field(battle_map.cache_dir, cost_hash, "landmarks", np.array(self.landmarks, dtype=np.int64))
+        self._views()
+
+    def _padded(self, distance_field: np.ndarray) -> np.ndarray:
+        padded = np.full((self.grid.height, self.grid.width), np.inf)
+        padded[1:-1, 1:-1] = distance_field
+        return padded.ravel()
+
+    def select(self, count):
+        """farthest-point 선택: 맵 중앙에서 가장 먼 셀부터, 이후엔 고른 랜드마크들과의 최소 거리가 가장 큰 셀"""
+        h, w = self.map.height, self.map.width
+        center = self.map.snap_to_reachable((w // 2, h // 2), (w // 2, h // 2)) or (w // 2, h // 2)
+        nearest = self._padded(build_distance_field(self.map, center))
+        for _ in range(count):
+            reachable = np.where(np.isfinite(nearest), nearest, -1.0)
+            if reachable.max() <= 0:
+                break
+            x, y = self.grid.coord(int(reachable.argmax()))
+            forward = self._padded(build_distance_field(self.map, (x, y)))
+            reverse = self._padded(build_distance_field(self.map, (x, y), reverse=True))
+            self.landmarks.append((x, y))
+            self.forward.append(forward)
+            self.reverse.append(reverse)
+            nearest = forward if len(self.landmarks) == 1 else np.minimum(nearest, forward)
+
+    def _views(self):
+        # 스칼라 접근이 많은 A* 루프용 (memoryview 인덱싱은 Python float 반환)
+        self._forward_views = [memoryview(np.ascontiguousarray(f)) for f in self.forward]
+        self._reverse_views = [memoryview(np.ascontiguousarray(r)) for r in self.reverse]
+
+    def heuristic(self, goal_i: int):
+        """goal 까지의 하한 h(셀 인덱스) — goal 에 도달할 수 있는 랜드마크 전부 사용
+
+        (8 개 중 출발 셀에서 하한이 큰 일부만 고르면 확장 셀이 늘어 오히려 느리다, bench_astar 참고)
+        """
+        chosen = []
+        for forward, reverse in zip(self._forward_views, self._reverse_views):
+            forward_goal, reverse_goal = forward[goal_i], reverse[goal_i]
+            if forward_goal == math.inf or reverse_goal == math.inf:
+                continue  # goal 과 다른 연결 요소의 랜드마크
+            chosen.append((forward, forward_goal, reverse, reverse_goal))
+
+        def h(i):
+            best = 0.0
+            for forward, forward_goal, reverse, reverse_goal in chosen:
+                bound = forward_goal - forward[i]
+                if bound > best:
+                    best = bound
+                bound = reverse[i] - reverse_goal
+                if bound > best:
+                    best = bound
+            return best
+
+        return h
+
+    def info(self) -> dict:
+        return {
+            "landmarks": self.landmarks,
+            "bytes": sum(f.nbytes for f in self.forward + self.reverse),
+        }
+
+
+def get_landmarks(battle_map: Map) -> LandmarkSet:
+    """Map 당 한 번 생성 (지형 필드 저장소에 있으면 mmap 으로 로드)"""
+    if battle_map.landmarks is None:
+        battle_map.landmarks = LandmarkSet(battle_map)
+    return battle_map.landmarks
+
+
+def landmark_astar(battle_map: Map, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """ALT 휴리스틱 A* (랜드마크가 없으면 먼저 생성)"""
+    return astar_pathfinding(battle_map, start, goal, landmarks=get_landmarks(battle_map))
@@ -3,8 +3,11 @@
 import numpy as np
 
 import math
+from collections import OrderedDict
 from heapq import heappush, heappop
 from typing import List, Tuple, Optional
+from .terrain_cache import TERRAIN_CACHE_DIR, terrain_cache_key, load_terrain_cache, save_terrain_cache
+from .terrain_cache import cost_map_hash, load_field, save_field, has_field
 from .unit_definitions import UnitType #, UnitStatus, UnitType, UnitComposition, HitState, UNIT_SPECS, get_landing_data, AMMUNITION_DATABASE, AmmunitionInfo, SUPPLY_DATABASE
 
 
@@ -12,6 +15,17 @@ from .unit_definitions import UnitType #, UnitStatus, UnitType, UnitComposition,
 MAX_TIME = 2880.0  # 300 # 2880.0 # 500.0  # 최대 시뮬레이션 시간 (분 단위) 
 # TIME_STEP = 0.01 # 시뮬레이션 시간 간격 (분 단위)
 TIME_STEP = 1.0
+# 8방향 이웃 (dx, dy, 거리 가중치) — 대각선은 1.15
+NEIGHBOR_STEPS = (
+    (-1, -1, 1.15), (-1, 0, 1.0), (-1, 1, 1.15),
+    (0, -1, 1.0),                   (0, 1, 1.0),
+    (1, -1, 1.15),  (1, 0, 1.0),  (1, 1, 1.15)
+)
+LOS_SCAN_STEPS = 8  # LOS 검사에서 이 스텝 수 이하 구간은 피라미드 없이 셀 단위로 검사
+FLOW_FIELD_CACHE_BYTES = 128 << 20  # 플로우 필드 캐시 예산 (float16 한 장 약 2 MB)
+VIEWSHED_CACHE_BYTES = 128 << 20  # 뷰쉐드 캐시 예산 (int8 한 장 약 0.5 MB)
+PATH_CACHE_SIZE = 4096  # 공유 경로 캐시 최대 항목 수
+PATH_CACHE_JOIN = 20  # 출발 셀이 캐시 경로에서 이 거리(셀) 이내면 이어서 사용
 # MAP_WIDTH = 30  # 맵의 너비
 # MAP_HEIGHT = 30  # 맵의 높이
 
@@ -38,9 +52,275 @@ class Coord:  # Coordinate class to store x, y, z coordinates
         self.y += velocity.y
         self.z += velocity.z
 
+class PathGrid:  # 경로탐색용 평탄화(flat) 비용 격자
+    """cost_map 을 1차원으로 펼치고 테두리에 inf 한 칸을 둘러서
+    이웃 셀 접근을 '인덱스 + 오프셋' 만으로 (범위 검사 없이) 할 수 있게 한다."""
+
+    def __init__(self, cost_map: np.ndarray):
+        h, w = cost_map.shape
+        self.map_height, self.map_width = h, w
+        self.height, self.width = h + 2, w + 2
+        self.size = self.height * self.width
+
+        padded = np.full((self.height, self.width), np.inf)
+        padded[1:-1, 1:-1] = cost_map
+        self.cost = padded.ravel()
+        self.cost_list = self.cost.tolist()  # 스칼라 접근이 많은 루프용
+
+        # (인덱스 오프셋, dx, dy, 거리 가중치) — get_neighbors 와 같은 순서
+        self.neighbors = tuple(
+            (dy * self.width + dx, dx, dy, base_dist) for dx, dy, base_dist in NEIGHBOR_STEPS
+        )
+
+    def contains(self, x, y) -> bool:
+        return 0 <= x < self.map_width and 0 <= y < self.map_height
+
+    def index(self, x, y) -> int:
+        return (y + 1) * self.width + (x + 1)
+
+    def coord(self, i) -> Tuple[int, int]:
+        y, x = divmod(i, self.width)
+        return (x - 1, y - 1)
+
+
+class FlowFieldCache:  # 목표 셀별 플로우 필드 LRU 캐시 (바이트 예산)
+    """플로우 필드를 float16 (셀당 4바이트, float64 의 1/4) 로 보관하고
+    총 바이트가 max_bytes 를 넘으면 가장 오래 안 쓴 목표부터 버린다.
+    조회한 값은 호출 측에서 float 로 바꿔 쓴다 (direction_at).
+    bytes 는 현재 보관 중인 필드의 합, hits / misses / evictions 는 clear 와 상관없는 누적 통계."""
+
+    def __init__(self, max_bytes=FLOW_FIELD_CACHE_BYTES, dtype=np.float16):
+        self.fields = OrderedDict()
+        self.max_bytes = max_bytes
+        self.dtype = dtype
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __contains__(self, goal):
+        return goal in self.fields
+
+    def get(self, goal) -> Optional[np.ndarray]:
+        field = self.fields.get(goal)
+        if field is None:
+            self.misses += 1
+            return None
+        self.fields.move_to_end(goal)
+        self.hits += 1
+        return field
+
+    def put(self, goal, flow_field: np.ndarray) -> np.ndarray:
+        """압축해서 저장 후 저장된 배열 반환 (예산 초과분은 오래된 것부터 제거, 방금 넣은 것은 유지)"""
+        field = flow_field.astype(self.dtype, copy=False)  # 이미 압축된 (mmap) 배열은 그대로
+        if goal in self.fields:
+            self.bytes -= self.fields.pop(goal).nbytes
+        self.fields[goal] = field
+        self.bytes += field.nbytes
+        while self.bytes > self.max_bytes and len(self.fields) > 1:
+            _, old = self.fields.popitem(last=False)
+            self.bytes -= old.nbytes
+            self.evictions += 1
+        return field
+
+    def clear(self):
+        """모든 필드를 버린다 (지형 비용 변경 시). bytes 는 0 이 되고
+        hits / misses / evictions 는 실행 전체 누적값이라 그대로 둔다 (evictions 에 clear 는 포함 안 됨)."""
+        self.fields.clear()
+        self.bytes = 0
+
+    def info(self) -> dict:
+        """캐시 통계 (튜닝용)"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.fields),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def flow_field_name(key) -> str:
+    """플로우 필드 저장소 파일 이름 — 목표 셀 (x, y) 또는 목적지 구역 ((x0, x1), (y0, y1))"""
+    if isinstance(key[0], tuple):
+        (x0, x1), (y0, y1) = key
+        return f"region_{x0}_{x1}_{y0}_{y1}"
+    return f"goal_{key[0]}_{key[1]}"
+
+
+def direction_at(flow_field: np.ndarray, x: int, y: int) -> Tuple[float, float]:
+    """플로우 필드 한 셀의 방향을 파이썬 float 로 (float16 스칼라가 좌표 계산에 섞이지 않게)"""
+    dx, dy = flow_field[y, x].tolist()
+    return dx, dy
+
+
+class PathCache:  # (목표 셀, 경로 방식) -> 경로들 LRU 캐시
+    """같은 소속 부대들은 서로 가까이에서 출발해 같은 목적지로 가므로
+    목표 셀과 경로 방식이 같은 경로를 공유한다. 출발 셀이 저장된 경로의 어떤 셀과
+    join_radius 셀 이내면 적중이고, 그 셀까지 짧은 연결 경로만 A* 로 찾아 나머지 구간을 이어 쓴다.
+    mode 는 도로망 경로의 도로 속도 비율 (부대마다 다름), HPA* / A* 경로는 None 이다.
+    먼 목표(HPA_MIN_DISTANCE 이상)에만 쓰며, 가까운 목표는 증분 계획기(DStarLite)가 맡는다."""
+
+    def __init__(self, max_entries=PATH_CACHE_SIZE, join_radius=PATH_CACHE_JOIN):
+        self.paths = OrderedDict()  # (goal, mode) -> [경로 배열, ...]
+        self.entries = 0
+        self.max_entries = max_entries
+        self.join_radius = join_radius
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def nearest(self, start, goal, mode=None):
+        """start 에서 join_radius 이내로 지나가는 캐시 경로와 가장 가까운 셀 순번 (없으면 None)"""
+        best, best_d2 = None, self.join_radius ** 2
+        for cached in self.paths.get((goal, mode), ()):
+            d2 = (cached[:, 0] - start[0])**2 + (cached[:, 1] - start[1])**2
+            join = int(np.argmin(d2))
+            if d2[join] <= best_d2:
+                best, best_d2 = (cached, join), d2[join]
+        return best
+
+    def lookup(self, battle_map: "Map", start, goal, mode=None) -> List[Tuple[int, int]]:
+        """연결 경로 + 캐시 경로 나머지 (없거나 연결 실패면 [])"""
+        found = self.nearest(start, goal, mode)
+        if found is None:
+            self.misses += 1
+            return []
+
+        cached, join = found
+        connector = astar_pathfinding(battle_map, start, tuple(cached[join].tolist()))
+        if not connector:
+            self.misses += 1
+            return []
+
+        self.paths.move_to_end((goal, mode))
+        self.hits += 1
+        return connector + [tuple(cell) for cell in cached[join + 1:].tolist()]
+
+    def put(self, goal, path, mode=None):
+        """goal 까지 이어진 경로만 저장 (HPA* 앞부분만 세밀화한 경로는 끝에서 다시 적중해 멈추므로 제외)"""
+        if not path or tuple(path[-1]) != tuple(goal):
+            return
+        key = (goal, mode)
+        self.paths.setdefault(key, []).append(np.array(path, dtype=np.int32))
+        self.paths.move_to_end(key)
+        self.entries += 1
+        while self.entries > self.max_entries and len(self.paths) > 1:
+            _, old = self.paths.popitem(last=False)
+            self.entries -= len(old)
+            self.evictions += len(old)
+
+    def clear(self):
+        """모든 경로를 버린다 (지형 비용 변경 시). hits / misses / evictions 는 실행 전체 누적값이라 그대로 둔다."""
+        self.paths.clear()
+        self.entries = 0
+
+    def info(self) -> dict:
+        """캐시 통계 (튜닝용)"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
 class Map:  # Map class to store map information
-    def __init__(self, filename = "map/golan_full_dataset_cropped.npz"): #, width, height):
+    def __init__(self, filename = "map/golan_full_dataset_cropped.npz", #, width, height):
+                 cache_dir = TERRAIN_CACHE_DIR, use_cache = True, los_cache_size = 200_000,
+                 flow_cache_bytes = FLOW_FIELD_CACHE_BYTES, viewshed_cache_bytes = VIEWSHED_CACHE_BYTES):
         self.resolution_m = 10
+
+        # terrain_cost 맵 (필요에 따라 값 조정)
+        # 0: 평지, 1: 험지, 2: 도로, 3: 호수, 4: 숲, 5: 개울
+        self.terrain_cost = {
+            0: 1.0,  # plain
+            1: 1.3,  # rugged (slope 10)
+            2: 3.5,  # rugged (slope 15)
+            3: 5.0,  # rugged (slope 20)
+            4: 15.0,  # rugged (slope 30)
+            5: np.inf,  # rugged (slope 35)
+            6: 0.8,  # road
+            7: np.inf,  # lake
+            8: 1.8,  # wood (forest)
+            9: 2.5,  # stream (smaller water)
+        }
+
+        # (0) 지형 캐시 확인 — 있으면 .npy 를 mmap 으로 열고 끝 (grid / cost_map 재계산 없음)
+        self.filename = filename
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.cache_key = terrain_cache_key(filename, self.terrain_cost) if use_cache else None
+        cached = load_terrain_cache(cache_dir, self.cache_key) if use_cache else None
+
+        if cached is not None:
+            layers, meta = cached
+            self.dem_arr       = layers["dem"]
+            self.aspect_arr    = layers["aspect"]
+            self.slope_arr     = layers["slope"]
+            self.road_mask     = layers["road_mask"]
+            self.lake_mask     = layers["lake_mask"]
+            self.stream_mask   = layers["stream_mask"]
+            self.wood_mask     = layers["wood_mask"]
+            self.transform_arr = layers["transform"]
+            self.crs_str       = meta["crs"]
+            self.height, self.width = self.dem_arr.shape
+            self.grid          = layers["grid"]
+            self.cost_map      = layers["cost_map"]
+        else:
+            self.load_source(filename)
+            self.grid = self.build_grid()
+            self.cost_map = self.build_cost_map()
+
+            if use_cache:
+                save_terrain_cache(cache_dir, self.cache_key, {
+                    "dem": self.dem_arr, "aspect": self.aspect_arr, "slope": self.slope_arr,
+                    "road_mask": self.road_mask, "lake_mask": self.lake_mask,
+                    "stream_mask": self.stream_mask, "wood_mask": self.wood_mask,
+                    "transform": self.transform_arr,
+                    "grid": self.grid, "cost_map": self.cost_map,
+                }, {"crs": self.crs_str, "source": filename})
+
+        self.reference_altitude = self.dem_arr[-1][0] # min([min(s) for s in self.dem_arr])
+
+        # LOS 조기 판정용 DEM 최대/최소 고도 피라미드
+        self.dem_max_pyramid, self.dem_min_pyramid = self.build_dem_pyramid()
+
+        #!TEMP 플로우 필드 캐시 >>>>
+        self.flow_fields = FlowFieldCache(flow_cache_bytes)  # 목표 셀 (x, y) -> 플로우 필드
+        self._cost_hash = None  # 필드 저장소 키 (cost_map 이 바뀌면 다시 계산)
+        self.path_cache = PathCache()  # 같은 출발 구역/목표 부대끼리 공유하는 경로
+        self._components = None  # 통과 가능 셀 연결 요소 라벨 (get_components)
+        self._path_grid = None  # A* 용 평탄화 비용 격자 (get_path_grid)
+        self.hpa = None  # HPA* 추상 그래프 (hpa.hpa_pathfinding 에서 생성)
+        self.landmarks = None  # ALT 랜드마크 거리장 (landmarks.get_landmarks 에서 생성)
+        self.road_graph = None  # 도로망 그래프 (road_graph.get_road_graph 에서 생성)
+        self.cost_version = 0  # set_cell_cost 호출마다 1 증가
+        self.cost_changes = []  # (version, x, y, 이전 비용, 새 비용) — 증분 경로 계획기가 읽어감
+        #!TEMP 플로우 필드 캐시 <<<<
+
+        # 뷰쉐드 캐시: (관측 셀 x, y, 관측 높이, 타겟 높이) -> int8 래스터 (셀당 1바이트), 바이트 예산 LRU
+        self.viewsheds = OrderedDict()
+        self.viewshed_cache_bytes = viewshed_cache_bytes
+        self.viewshed_bytes = 0
+
+        # LOS 메모: 셀 쌍의 LOS 는 변하지 않으므로 LRU 로 보관 (항목 수 제한, 항목당 약 200바이트)
+        self.los_cache = OrderedDict()
+        self.los_cache_size = los_cache_size
+        self.los_cache_hits = 0
+        self.los_cache_misses = 0
+
+    def load_source(self, filename):
+        """원본 npz 에서 래스터/마스크 레이어와 메타정보 로드"""
         # (1) 데이터 로드
         data = np.load(filename, allow_pickle=True)
 
@@ -54,76 +334,62 @@ class Map:  # Map class to store map information
         self.wood_mask     = data["wood_mask"]
         
         # 3) 메타정보 복원
-        transform_arr = data["transform"]            # (6,) 배열
+        self.transform_arr = data["transform"]            # (6,) 배열
         # transform     = Affine.from_gdal(*transform_arr)
-        crs_str       = str(data["crs"].item())      # e.g. "EPSG:3857"
+        self.crs_str       = str(data["crs"].item())      # e.g. "EPSG:3857"
         # crs           = CRS.from_string(crs_str)
 
         self.height, self.width = self.dem_arr.shape
-        self.reference_altitude = self.dem_arr[-1][0] # min([min(s) for s in self.dem_arr])
-        
-        # terrain_cost 맵 (필요에 따라 값 조정)
-        # 0: 평지, 1: 험지, 2: 도로, 3: 호수, 4: 숲, 5: 개울
-        self.terrain_cost = {
-            0: 1.0,  # plain
-            1: 1.3,  # rugged (slope 10)
-            2: 3.5,  # rugged (slope 15)
-            3: 5.0,  # rugged (slope 20)
-            4: 15.0,  # rugged (slope 30)
-            5: np.inf,  # rugged (slope 35)
-            6: 0.8,  # road
-            7: np.inf,  # lake
-            8: 1.8,  # wood (forest)
-            9: 2.5,  # stream (smaller water)
-        }
 
+    def build_grid(self):
+        """경사/마스크 레이어로 지형 가중치 grid 생성"""
         # 1) 빈 grid 생성 (height x width)
-        self.grid = np.ones((self.height, self.width), dtype=float)
+        grid = np.ones((self.height, self.width), dtype=float)
 
         # 2) slope 기준으로 험지 마킹 (optional)
         slope_threshold = 10.0  # degree 단위 예시 값
-        self.grid[self.slope_arr > slope_threshold] *= self.terrain_cost[1]
+        grid[self.slope_arr > slope_threshold] *= self.terrain_cost[1]
         # 2) slope 기준으로 험지 마킹 (optional)
         slope_threshold = 15.0  # degree 단위 예시 값
-        self.grid[self.slope_arr > slope_threshold] *= self.terrain_cost[2]
+        grid[self.slope_arr > slope_threshold] *= self.terrain_cost[2]
         slope_threshold = 20.0  # degree 단위 예시 값
-        self.grid[self.slope_arr > slope_threshold] *= self.terrain_cost[3]
+        grid[self.slope_arr > slope_threshold] *= self.terrain_cost[3]
         slope_threshold = 30.0  # degree 단위 예시 값
-        self.grid[self.slope_arr > slope_threshold] *= self.terrain_cost[4]
+        grid[self.slope_arr > slope_threshold] *= self.terrain_cost[4]
         slope_threshold = 35.0  # degree 단위 예시 값
-        self.grid[self.slope_arr > slope_threshold] *= self.terrain_cost[5]
+        grid[self.slope_arr > slope_threshold] *= self.terrain_cost[5]
 
         # 3) 도로, 호수, 숲, 개울 덮어쓰기
         #    (마스크가 True/1인 곳에 해당 코드 적용)
-        self.grid[self.road_mask.astype(bool)]   *= self.terrain_cost[6]
-        self.grid[self.lake_mask.astype(bool)]   *= self.terrain_cost[7] #lask = np.inf
-        self.grid[self.wood_mask.astype(bool)]   *= self.terrain_cost[8]
-        self.grid[self.stream_mask.astype(bool)] *= self.terrain_cost[9]
-        
-        #!TEMP 비용 맵과 플로우 필드 생성 >>>>
-        self.cost_map = self.build_cost_map()
-        self.flow_fields = {}  # 목표별 플로우 필드 캐시
-        #!TEMP 비용 맵과 플로우 필드 생성 <<<<
+        grid[self.road_mask.astype(bool)]   *= self.terrain_cost[6]
+        grid[self.lake_mask.astype(bool)]   *= self.terrain_cost[7] #lask = np.inf
+        grid[self.wood_mask.astype(bool)]   *= self.terrain_cost[8]
+        grid[self.stream_mask.astype(bool)] *= self.terrain_cost[9]
+
+        return grid
 
     #!TEMP >>>>
     def build_cost_map(self, slope_weight=0.1, min_cost=0.1):
-        """각 셀의 이동 비용 계산"""
-        h, w = self.slope_arr.shape
-        cost_map = np.zeros((h, w), dtype=float)
-        
-        for i in range(h):
-            for j in range(w):
-                terrain_type = self.grid[i, j]
-                base_cost = self.terrain_cost.get(terrain_type, 1.0)
-                
-                if base_cost == np.inf:
-                    cost_map[i, j] = np.inf
-                else:
-                    # 경사도 추가 비용
-                    slope = float(self.slope_arr[i, j])
-                    slope_cost = 1.0 + slope * slope_weight
-                    cost_map[i, j] = max(min_cost, base_cost * slope_cost)
-                    
+        """각 셀의 이동 비용 계산 (NumPy 배열 연산)
+
+        셀 단위 반복문과 동일한 규칙을 그대로 따른다.
+        - grid 값을 terrain_cost 키로 조회 (float 키 비교, 없으면 1.0)
+        - 기본 비용이 inf 이면 inf
+        - 그 외에는 max(min_cost, base_cost * (1 + slope * slope_weight))
+        """
+        # 1) terrain_cost.get(grid 값, 1.0) 조회를 마스크로 대체
+        base_cost = np.ones(self.grid.shape, dtype=float)
+        for terrain_type, cost in self.terrain_cost.items():
+            base_cost[self.grid == terrain_type] = cost
+
+        # 2) 경사도 추가 비용 (float() 변환과 동일하게 float64 로 계산)
+        slope = self.slope_arr.astype(float)
+        cost = base_cost * (1.0 + slope * slope_weight)
+
+        # 3) max(min_cost, cost) — NaN 은 파이썬 max 와 같이 min_cost 로 처리
+        cost_map = np.where(cost > min_cost, cost, min_cost)
+        cost_map[base_cost == np.inf] = np.inf
+
         return cost_map
     
     def is_passable(self, x: int, y: int) -> bool:
@@ -135,19 +401,137 @@ class Map:  # Map class to store map information
     def get_neighbors(self, x: int, y: int) -> List[Tuple[int, int, float]]:
         """8방향 이웃 셀과 이동 비용 반환"""
         neighbors = []
-        directions = [
-            (-1, -1, 1.15), (-1, 0, 1.0), (-1, 1, 1.15),
-            (0, -1, 1.0),                   (0, 1, 1.0),
-            (1, -1, 1.15),  (1, 0, 1.0),  (1, 1, 1.15)
-        ]
         
-        for dx, dy, base_dist in directions:
+        for dx, dy, base_dist in NEIGHBOR_STEPS:
             nx, ny = x + dx, y + dy
             if self.is_passable(nx, ny):
                 cost = self.cost_map[ny, nx] * base_dist
                 neighbors.append((nx, ny, cost))
         
         return neighbors
+
+    def get_flow_field(self, goal) -> np.ndarray:
+        """목표 셀 플로우 필드 (메모리 캐시 -> 디스크 저장소 -> 새로 생성 순)"""
+        return self._cached_flow_field(goal, flow_field_name(goal),
+                                       lambda: build_flow_field(self, goal))
+
+    def has_flow_field(self, key) -> bool:
+        """목표 셀 / 목적지 구역 플로우 필드가 메모리나 디스크 저장소에 이미 있는지"""
+        if key in self.flow_fields:
+            return True
+        return self.use_cache and has_field(self.cache_dir, self.cost_hash(), flow_field_name(key))
+
+    def get_components(self) -> np.ndarray:
+        """통과 가능 셀의 8방향 연결 요소 라벨 (H, W) int32, 통과 불가 셀은 -1
+
+        벡터화 union-find: 인접한 통과 가능 셀 쌍마다 두 루트 중 큰 쪽을 작은 쪽에 연결(hooking)하고
+        parent = parent[parent] 로 경로를 압축하는 것을 변화가 없을 때까지 반복한다.
+        """
+        if self._components is None:
+            h, w = self.height, self.width
+            passable = np.zeros((h + 2, w + 2), dtype=bool)
+            passable[1:-1, 1:-1] = np.isfinite(self.cost_map)
+            passable = passable.ravel()
+            width = w + 2
+
+            cells = np.flatnonzero(passable)
+            us, vs = [], []
+            for offset in (1, width - 1, width, width + 1):  # 오른쪽, 아래 3방향 (무방향 간선 한 번씩)
+                nbr = cells + offset
+                ok = passable[nbr]
+                us.append(cells[ok])
+                vs.append(nbr[ok])
+            us, vs = np.concatenate(us), np.concatenate(vs)
+
+            parent = np.arange(passable.size)
+            while True:
+                pu, pv = parent[us], parent[vs]
+                differ = pu != pv
+                if not differ.any():
+                    break
+                pu, pv = pu[differ], pv[differ]
+                np.minimum.at(parent, np.maximum(pu, pv), np.minimum(pu, pv))
+                while True:  # 경로 압축 (모든 셀이 루트를 직접 가리킬 때까지)
+                    grand = parent[parent]
+                    if np.array_equal(grand, parent):
+                        break
+                    parent = grand
+
+            labels = np.where(passable, parent, -1).reshape(h + 2, w + 2)[1:-1, 1:-1]
+            self._components = labels.astype(np.int32)
+        return self._components
+
+    def reachable_labels(self, start) -> set:
+        """start 에서 갈 수 있는 연결 요소 라벨 (start 가 통과 불가 셀이면 통과 가능한 이웃들의 요소)"""
+        labels = self.get_components()
+        x, y = start
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return set()
+        if labels[y, x] >= 0:
+            return {int(labels[y, x])}
+        window = labels[max(y - 1, 0):y + 2, max(x - 1, 0):x + 2]
+        return set(window[window >= 0].tolist())
+
+    def is_reachable(self, start, goal) -> bool:
+        """start -> goal 경로 존재 여부 (O(1), 경로탐색 전에 불가능한 질의를 걸러냄)"""
+        gx, gy = goal
+        if not (0 <= gx < self.width and 0 <= gy < self.height):
+            return False
+        return int(self.get_components()[gy, gx]) in self.reachable_labels(start)
+
+    def snap_to_reachable(self, start, goal) -> Optional[Tuple[int, int]]:
+        """goal 에 갈 수 없으면 start 에서 갈 수 있는 가장 가까운 셀로 옮김 (아예 없으면 None)"""
+        if self.is_reachable(start, goal):
+            return goal
+        reachable = self.reachable_labels(start)
+        if not reachable:
+            return None
+        labels = self.get_components()
+        gx = min(max(goal[0], 0), self.width - 1)
+        gy = min(max(goal[1], 0), self.height - 1)
+        radius = 8
+        while True:
+            # goal 주변 창에서 먼저 찾고, 없으면 창을 넓힘
+            x0, x1 = max(gx - radius, 0), min(gx + radius + 1, self.width)
+            y0, y1 = max(gy - radius, 0), min(gy + radius + 1, self.height)
+            ys, xs = np.nonzero(np.isin(labels[y0:y1, x0:x1], list(reachable)))
+            if xs.size:
+                d2 = (xs + x0 - goal[0])**2 + (ys + y0 - goal[1])**2
+                i = int(np.argmin(d2))
+                return (int(xs[i] + x0), int(ys[i] + y0))
+            if x0 == 0 and y0 == 0 and x1 == self.width and y1 == self.height:
+                return None
+            radius *= 4
+
+    def get_region_flow_field(self, region) -> np.ndarray:
+        """목적지 구역 공유 플로우 필드 (flow_fields 캐시에 region 키로 보관)"""
+        return self._cached_flow_field(region, flow_field_name(region),
+                                       lambda: build_region_flow_field(self, region))
+
+    def _cached_flow_field(self, key, name, build) -> np.ndarray:
+        flow_field = self.flow_fields.get(key)
+        if flow_field is not None:
+            return flow_field
+
+        # 같은 지형/비용이면 이전 실행에서 저장한 필드를 mmap 으로 (페이지는 실제로 읽을 때 로드)
+        if self.use_cache:
+            flow_field = load_field(self.cache_dir, self.cost_hash(), name)
+        if flow_field is None:
+            flow_field = build().astype(self.flow_fields.dtype)
+            if self.use_cache:
+                save_field(self.cache_dir, self.cost_hash(), name, flow_field)
+        return self.flow_fields.put(key, flow_field)
+
+    def cost_hash(self) -> str:
+        if self._cost_hash is None:
+            self._cost_hash = cost_map_hash(self.cost_map)
+        return self._cost_hash
+
+    def get_path_grid(self) -> "PathGrid":
+        """경로탐색용 평탄화 비용 격자 (처음 필요할 때 생성)"""
+        if self._path_grid is None:
+            self._path_grid = PathGrid(self.cost_map)
+        return self._path_grid
     #!TEMP <<<<
     
     # def is_impassable(self, x, y) -> bool:
@@ -182,8 +566,52 @@ class Map:  # Map class to store map information
 
     def add_obstacle(self, x, y):
         if 0 <= x < self.width and 0 <= y < self.height:
+            if not self.grid.flags.writeable:  # 지형 캐시(mmap, 읽기 전용)에서 로드된 경우
+                self.grid = np.array(self.grid)
             self.grid[y][x] = 1  # Mark as obstacle
 
+    def set_cell_cost(self, x, y, cost):
+        """셀 이동 비용 변경 (파괴된 다리, 연막, 지뢰 지대 등)
+
+        경로탐색 격자는 그 자리에서 갱신하고, 비용에 의존하는 캐시(플로우 필드, HPA*)는 버린다.
+        변경 내역은 cost_changes 에 남겨 증분 계획기(DStarLite)가 영향 받는 셀만 다시 계산한다.
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return
+        old_cost = float(self.cost_map[y, x])
+        cost = float(cost)
+        if old_cost == cost:
+            return
+        if not self.cost_map.flags.writeable:  # 지형 캐시(mmap, 읽기 전용)에서 로드된 경우
+            self.cost_map = np.array(self.cost_map)
+        self.cost_map[y, x] = cost
+
+        self.cost_version += 1
+        self.cost_changes.append((self.cost_version, x, y, old_cost, cost))
+
+        if self._path_grid is not None:
+            i = self._path_grid.index(x, y)
+            self._path_grid.cost[i] = cost
+            self._path_grid.cost_list[i] = cost
+        self.flow_fields.clear()
+        self.path_cache.clear()
+        self._components = None
+        self._cost_hash = None
+        self.hpa = None
+        self.landmarks = None  # 비용이 내려간 셀이 있으면 하한이 깨지므로 다시 생성
+        self.road_graph = None
+
+    def cost_changes_since(self, version) -> dict:
+        """version 이후 바뀐 셀 -> (처음 이전 비용, 마지막 새 비용)"""
+        changes = {}
+        for v, x, y, old_cost, cost in reversed(self.cost_changes):
+            if v <= version:
+                break
+            # 뒤에서부터 읽으므로 이전 비용은 계속 덮어쓰고 새 비용은 처음 본 값 유지
+            new_cost = changes[(x, y)][1] if (x, y) in changes else cost
+            changes[(x, y)] = (old_cost, new_cost)
+        return changes
+
     def is_obstacle(self, x, y):
         return self.grid[y][x] == 1
 
@@ -211,6 +639,7 @@ class Map:  # Map class to store map information
         Fast line-of-sight check using integer grid steps.
         Returns True if there is a clear LOS from from_coord to to_coord.
         Elevations are taken from DEM; observer/target heights in meters.
+        If the observer cell has a cached viewshed, the answer is read from it.
         """
         x0, y0 = int(round(from_coord.x)), int(round(from_coord.y))
         x1, y1 = int(round(to_coord.x)), int(round(to_coord.y))
@@ -220,68 +649,357 @@ class Map:  # Map class to store map information
         if not (0 <= x1 < self.width and 0 <= y1 < self.height):
             return False
 
-        z0 = self.dem_arr[y0, x0] + observer_height
-        z1 = self.dem_arr[y1, x1] + target_height
+        if max(abs(x1 - x0), abs(y1 - y0)) == 0:
+            return True  # Same cell
+
+        viewshed = self.lookup_viewshed(x0, y0, observer_height, target_height)
+        if viewshed is not None:
+            known = viewshed[y1, x1]
+            if known >= 0:
+                return bool(known)
+            visible = self._march_ray(x0, y0, x1, y1, observer_height, target_height)
+            viewshed[y1, x1] = visible
+            return visible
+
+        # LOS 메모 (셀 쌍 + 높이 키, LRU)
+        key = (x0, y0, x1, y1, observer_height, target_height)
+        visible = self._los_cache_get(key)
+        if visible is None:
+            visible = self._march_ray(x0, y0, x1, y1, observer_height, target_height)
+            self._los_cache_put(key, visible)
+        return visible
+
+    def _march_ray(self, x0, y0, x1, y1, observer_height, target_height) -> bool:
+        """한 광선(ray)을 따라가며 지형에 가려지는지 검사
+
+        DEM 최대/최소 고도 피라미드로 광선 구간을 먼저 검사한다.
+        - 구간이 지나는 블록의 최고 고도보다 시선이 높으면 구간 전체 통과
+        - 블록의 최저 고도보다 시선이 낮으면 구간 전체 차단
+        애매한 구간만 반으로 나누어 내려가고, 짧은 구간은 셀 단위로 검사한다.
+        결과는 셀 단위 검사와 동일하다.
+        """
+        # 고도는 float64 로 계산 (visible_many 와 결과를 일치시키기 위해 명시적으로 변환)
+        z0 = float(self.dem_arr[y0, x0]) + observer_height
+        z1 = float(self.dem_arr[y1, x1]) + target_height
 
         dx = abs(x1 - x0)
         dy = abs(y1 - y0)
         n = max(dx, dy)
-        if n == 0:
-            return True  # Same cell
+        if n <= 1:
+            return True  # Same / adjacent cell
 
-        # Precompute per-step increments
-        for step in range(1, n):
-            t = step / n
-            xi = int(round(x0 + (x1 - x0) * t))
-            yi = int(round(y0 + (y1 - y0) * t))
-            zi_expected = z0 + (z1 - z0) * t
+        stack = [(1, n - 1)]  # 검사할 스텝 구간 [a, b]
+        while stack:
+            a, b = stack.pop()
 
-            # Bounds check (just in case)
-            if not (0 <= xi < self.width and 0 <= yi < self.height):
-                return False
+            if b - a < LOS_SCAN_STEPS:
+                for step in range(a, b + 1):
+                    t = step / n
+                    xi = int(round(x0 + (x1 - x0) * t))
+                    yi = int(round(y0 + (y1 - y0) * t))
+                    zi_expected = z0 + (z1 - z0) * t
 
-            ground_z = self.dem_arr[yi, xi]
-            if ground_z + 0.5 > zi_expected:  # Blocked
-                return False
+                    # Bounds check (just in case)
+                    if not (0 <= xi < self.width and 0 <= yi < self.height):
+                        return False
+
+                    ground_z = float(self.dem_arr[yi, xi])
+                    if ground_z + 0.5 > zi_expected:  # Blocked
+                        return False
+                continue
+
+            # 구간 양 끝 샘플 — 좌표와 시선 고도는 스텝에 대해 단조이므로
+            # 구간의 모든 샘플 셀은 두 끝점의 bounding box 안에 있다
+            ta, tb = a / n, b / n
+            xa, ya = int(round(x0 + (x1 - x0) * ta)), int(round(y0 + (y1 - y0) * ta))
+            xb, yb = int(round(x0 + (x1 - x0) * tb)), int(round(y0 + (y1 - y0) * tb))
+            za, zb = z0 + (z1 - z0) * ta, z0 + (z1 - z0) * tb
+
+            level = min(len(self.dem_max_pyramid) - 1, (b - a).bit_length() - 1)
+            bx0, bx1 = min(xa, xb) >> level, max(xa, xb) >> level
+            by0, by1 = min(ya, yb) >> level, max(ya, yb) >> level
+
+            ground_max = float(self.dem_max_pyramid[level][by0:by1 + 1, bx0:bx1 + 1].max())
+            if ground_max + 0.5 <= min(za, zb):
+                continue  # 구간 전체 통과
+
+            ground_min = float(self.dem_min_pyramid[level][by0:by1 + 1, bx0:bx1 + 1].min())
+            if ground_min + 0.5 > max(za, zb):
+                return False  # 구간 전체 차단
+
+            mid = (a + b) // 2
+            stack.append((mid + 1, b))
+            stack.append((a, mid))  # 관측자에 가까운 쪽부터 검사
 
         return True
 
+    def build_dem_pyramid(self):
+        """DEM 최대/최소 고도 피라미드 (level k: 2^k x 2^k 블록)"""
+        max_levels = [np.asarray(self.dem_arr)]
+        min_levels = [np.asarray(self.dem_arr)]
+        while max(max_levels[-1].shape) > 1:
+            for levels, reduce in ((max_levels, np.fmax), (min_levels, np.fmin)):
+                prev = levels[-1]
+                h, w = prev.shape
+                # 홀수 크기는 마지막 행/열을 복제해서 짝수로 맞춤
+                prev = np.pad(prev, ((0, h % 2), (0, w % 2)), mode="edge")
+                levels.append(reduce(
+                    reduce(prev[0::2, 0::2], prev[0::2, 1::2]),
+                    reduce(prev[1::2, 0::2], prev[1::2, 1::2]),
+                ))
+        return max_levels, min_levels
+
+    def visible_many(self, observer_coord: Coord, target_xs, target_ys,
+                     observer_height=2.0, target_height=2.0) -> np.ndarray:
+        """
+        Batched line-of-sight check: one observer vs. many targets.
+        Samples every ray at once with NumPy fancy indexing into dem_arr and
+        returns a boolean array (same order as target_xs / target_ys).
+        The result is bit-identical to calling is_visible for each target.
+        """
+        tx = np.rint(np.asarray(target_xs, dtype=float)).astype(np.int64)
+        ty = np.rint(np.asarray(target_ys, dtype=float)).astype(np.int64)
+        visible = np.zeros(tx.shape, dtype=bool)
+
+        x0, y0 = int(round(observer_coord.x)), int(round(observer_coord.y))
+        if not (0 <= x0 < self.width and 0 <= y0 < self.height):
+            return visible
+
+        inside = (tx >= 0) & (tx < self.width) & (ty >= 0) & (ty < self.height)
+        idx = np.flatnonzero(inside)
+        if idx.size == 0:
+            return visible
+
+        # 뷰쉐드가 있으면 이미 계산된 칸은 배열 조회로 끝냄
+        viewshed = self.lookup_viewshed(x0, y0, observer_height, target_height)
+        if viewshed is not None:
+            known = viewshed[ty[idx], tx[idx]]
+            visible[idx[known >= 0]] = known[known >= 0] == 1
+            idx = idx[known < 0]
+
+        if idx.size and viewshed is not None:
+            result = self._march_rays(x0, y0, tx[idx], ty[idx], observer_height, target_height)
+            visible[idx] = result
+            viewshed[ty[idx], tx[idx]] = result
+        elif idx.size:
+            # LOS 메모에 있는 셀 쌍은 재계산하지 않음
+            keys = [(x0, y0, x, y, observer_height, target_height)
+                    for x, y in zip(tx[idx].tolist(), ty[idx].tolist())]
+            misses = []
+            for i, key in zip(idx.tolist(), keys):
+                cached = self._los_cache_get(key)
+                if cached is None:
+                    misses.append(i)
+                else:
+                    visible[i] = cached
+            if misses:
+                misses = np.asarray(misses)
+                result = self._march_rays(x0, y0, tx[misses], ty[misses], observer_height, target_height)
+                visible[misses] = result
+                for i, value in zip(misses.tolist(), result.tolist()):
+                    self._los_cache_put((x0, y0, int(tx[i]), int(ty[i]), observer_height, target_height), value)
+
+        return visible
+
+    def _march_rays(self, x0, y0, tx, ty, observer_height, target_height,
+                    max_samples=1 << 21) -> np.ndarray:
+        """한 관측자에서 여러 타겟 셀까지의 광선을 NumPy 로 한 번에 검사 (_march_ray 와 동일 규칙)"""
+        visible = np.ones(tx.shape, dtype=bool)  # 같은 셀 / 인접 셀은 중간 샘플이 없으므로 항상 보임
+
+        dx = tx - x0
+        dy = ty - y0
+        n = np.maximum(np.abs(dx), np.abs(dy))
+
+        # 광선 길이순으로 정렬해서 비슷한 길이끼리 묶음(chunk) 처리 — 패딩 낭비와 메모리를 제한
+        idx = np.flatnonzero(n > 1)
+        if idx.size == 0:
+            return visible
+        idx = idx[np.argsort(n[idx], kind="stable")]
+
+        z0 = float(self.dem_arr[y0, x0]) + observer_height
+        z1 = self.dem_arr[ty, tx].astype(float) + target_height
+
+        n_sorted = n[idx]
+        start = 0
+        while start < idx.size:
+            # (묶음 크기 x 묶음 내 최대 길이) <= max_samples 가 되도록 묶음 크기 결정
+            samples = np.arange(1, idx.size - start + 1) * n_sorted[start:]
+            chunk = max(1, int(np.searchsorted(samples, max_samples, side="right")))
+            sel = idx[start:start + chunk]
+            start += chunk
+
+            n_sel = n[sel][:, None]
+            steps = np.arange(1, int(n_sel.max()), dtype=np.int64)[None, :]
+            # 스텝 범위를 넘어가는 칸은 마지막 스텝을 반복 (결과에 영향 없음)
+            t = np.minimum(steps, n_sel - 1) / n_sel
+
+            xi = np.rint(x0 + dx[sel][:, None] * t).astype(np.int64)
+            yi = np.rint(y0 + dy[sel][:, None] * t).astype(np.int64)
+            zi_expected = z0 + (z1[sel] - z0)[:, None] * t
+
+            ground_z = self.dem_arr[yi, xi].astype(float)
+            visible[sel] = ~(ground_z + 0.5 > zi_expected).any(axis=1)
+
+        return visible
+
+    # ---- LOS 메모: (관측 셀, 타겟 셀, 높이) -> 보임 여부, LRU ----
+    def _los_cache_get(self, key):
+        visible = self.los_cache.get(key)
+        if visible is None:
+            self.los_cache_misses += 1
+            return None
+        self.los_cache.move_to_end(key)
+        self.los_cache_hits += 1
+        return visible
+
+    def _los_cache_put(self, key, visible):
+        if self.los_cache_size <= 0:
+            return
+        self.los_cache[key] = visible
+        while len(self.los_cache) > self.los_cache_size:
+            self.los_cache.popitem(last=False)
+
+    def los_cache_info(self) -> dict:
+        """LOS 메모 통계 (튜닝용)"""
+        lookups = self.los_cache_hits + self.los_cache_misses
+        return {
+            "entries": len(self.los_cache),
+            "max_entries": self.los_cache_size,
+            "hits": self.los_cache_hits,
+            "misses": self.los_cache_misses,
+            "hit_rate": self.los_cache_hits / lookups if lookups else 0.0,
+        }
+
+    def clear_los_cache(self):
+        """LOS 메모를 비운다. hits / misses 는 다른 캐시와 같이 실행 전체 누적값이라 그대로 둔다."""
+        self.los_cache.clear()
+
+    # ---- 뷰쉐드(viewshed): 고정 관측자 셀별 가시성 래스터 ----
+    def lookup_viewshed(self, x, y, observer_height=2.0, target_height=2.0):
+        """캐시된 뷰쉐드 래스터 반환 (없으면 None). -1: 미계산, 0: 안 보임, 1: 보임"""
+        key = (x, y, observer_height, target_height)
+        viewshed = self.viewsheds.get(key)
+        if viewshed is not None:
+            self.viewsheds.move_to_end(key)
+        return viewshed
+
+    def get_viewshed(self, x, y, observer_height=2.0, target_height=2.0):
+        """관측자 셀 (x, y) 의 뷰쉐드 래스터를 반환 — 처음 필요할 때 생성해서 캐시에 보관
+
+        래스터 값은 해당 타겟 셀을 처음 조회할 때 광선 검사로 채워지고,
+        이후 같은 셀에서의 LOS 판정은 배열 조회 한 번으로 끝난다.
+        """
+        x, y = int(round(x)), int(round(y))
+        viewshed = self.lookup_viewshed(x, y, observer_height, target_height)
+        if viewshed is None:
+            viewshed = np.full((self.height, self.width), -1, dtype=np.int8)
+            self.viewsheds[(x, y, observer_height, target_height)] = viewshed
+            self.viewshed_bytes += viewshed.nbytes
+            # 예산 초과분은 가장 오래 쓰지 않은 뷰쉐드부터 제거 (방금 만든 것은 유지)
+            while self.viewshed_bytes > self.viewshed_cache_bytes and len(self.viewsheds) > 1:
+                _, old = self.viewsheds.popitem(last=False)
+                self.viewshed_bytes -= old.nbytes
+        return viewshed
+
+    def compute_viewshed(self, x, y, radius, observer_height=2.0, target_height=2.0):
+        """관측자 셀 (x, y) 에서 반경 radius(픽셀) 이내 모든 셀의 가시성을 미리 계산"""
+        x, y = int(round(x)), int(round(y))
+        viewshed = self.get_viewshed(x, y, observer_height, target_height)
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return viewshed
+
+        r = int(math.ceil(radius))
+        y_lo, y_hi = max(0, y - r), min(self.height, y + r + 1)
+        x_lo, x_hi = max(0, x - r), min(self.width, x + r + 1)
+        ys, xs = np.mgrid[y_lo:y_hi, x_lo:x_hi]
+        todo = ((xs - x) ** 2 + (ys - y) ** 2 <= radius * radius) & (viewshed[y_lo:y_hi, x_lo:x_hi] < 0)
+
+        tx, ty = xs[todo], ys[todo]
+        if tx.size:
+            viewshed[ty, tx] = self._march_rays(x, y, tx, ty, observer_height, target_height)
+        return viewshed
+
+    def precompute_viewsheds(self, cells, radius, observer_height=2.0, target_height=2.0):
+        """여러 관측자 셀의 뷰쉐드를 일괄 계산 (radius: 공통 값 또는 셀별 리스트)"""
+        cells = list(cells)
+        radii = radius if np.ndim(radius) else [radius] * len(cells)
+        for (x, y), r in zip(cells, radii):
+            self.compute_viewshed(x, y, r, observer_height, target_height)
+
         
 #!TEMP >>>>
-def astar_pathfinding(battle_map: Map, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
-    """A* 알고리즘으로 최적 경로 탐색"""
-    def heuristic(a, b):
-        return math.sqrt((a[0] - b[0])**2 + (a[1] - b[1])**2)
-    
-    open_set = []
-    heappush(open_set, (0, start))
-    
-    came_from = {}
-    g_score = {start: 0}
-    f_score = {start: heuristic(start, goal)}
-    
+def astar_pathfinding(battle_map: Map, start: Tuple[int, int], goal: Tuple[int, int],
+                      landmarks=None) -> List[Tuple[int, int]]:
+    """A* 알고리즘으로 최적 경로 탐색 (평탄화 배열 기반)
+
+    g-score / parent 는 셀 인덱스로 접근하는 NumPy 배열, 이웃은 미리 계산한
+    8방향 오프셋·비용 표로 순회하고, 힙의 오래된 항목은 꺼낼 때 건너뛴다(lazy deletion).
+    이웃 순서와 동률 처리 (f, x, y) 가 이전 구현과 같으므로 같은 경로를 반환한다.
+    landmarks (landmarks.LandmarkSet) 를 주거나 Map 에 이미 만들어져 있으면 (landmarks.get_landmarks)
+    유클리드 거리 대신 ALT 하한을 휴리스틱으로 쓴다. 유클리드 거리는 최적 경로를 보장하지 못한다:
+    대각선 한 칸이 셀 비용 x 1.15 (< √2) 라 비용 1 인 평지에서도 실제 비용보다 크고,
+    build_cost_map 은 비용을 min_cost(0.1) 까지만 막으므로 도로 비용만 1 로 올려서는 해결되지 않는다.
+    ALT 하한은 같은 비용 모델의 거리장에서 나오므로 항상 보장한다.
+    """
+    grid = battle_map.get_path_grid()
+    if not (grid.contains(*start) and grid.contains(*goal)):
+        return []  # 맵 밖 목표는 도달 불가
+    if start != goal and not battle_map.is_reachable(start, goal):
+        return []  # 다른 연결 요소 (맵 전체를 탐색하기 전에 거절)
+
+    width = grid.width
+    cost = grid.cost_list
+    neighbors = grid.neighbors
+    sqrt = math.sqrt
+    inf = math.inf
+
+    start_x, start_y = start
+    goal_x, goal_y = goal
+    start_i = grid.index(start_x, start_y)
+    goal_i = grid.index(goal_x, goal_y)
+    if landmarks is None:
+        landmarks = battle_map.landmarks
+    h = landmarks.heuristic(goal_i) if landmarks is not None else None
+
+    g_score = np.full(grid.size, inf)
+    came_from = np.full(grid.size, -1, dtype=np.int64)
+    g_score[start_i] = 0.0
+
+    # (f, x, y, 셀 인덱스, push 시점의 g)
+    open_set = [(0, start_x, start_y, start_i, 0.0)]
+
     while open_set:
-        current = heappop(open_set)[1]
-        
-        if current == goal:
+        _, x, y, current, current_g = heappop(open_set)
+
+        if current_g > g_score[current]:
+            continue  # 더 좋은 값으로 갱신된 오래된 항목
+
+        if current == goal_i:
             # 경로 재구성
             path = []
-            while current in came_from:
-                path.append(current)
-                current = came_from[current]
+            while current != start_i:
+                path.append(grid.coord(current))
+                current = int(came_from[current])
             path.append(start)
             return path[::-1]
-        
-        for neighbor_x, neighbor_y, move_cost in battle_map.get_neighbors(*current):
-            neighbor = (neighbor_x, neighbor_y)
-            tentative_g = g_score[current] + move_cost
-            
-            if neighbor not in g_score or tentative_g < g_score[neighbor]:
+
+        for offset, dx, dy, base_dist in neighbors:
+            neighbor = current + offset
+            neighbor_cost = cost[neighbor]
+            if neighbor_cost == inf:
+                continue
+            tentative_g = current_g + neighbor_cost * base_dist
+
+            if tentative_g < g_score[neighbor]:
                 came_from[neighbor] = current
                 g_score[neighbor] = tentative_g
-                f_score[neighbor] = tentative_g + heuristic(neighbor, goal)
-                heappush(open_set, (f_score[neighbor], neighbor))
-    
+                nx, ny = x + dx, y + dy
+                if h is None:
+                    f = tentative_g + sqrt((nx - goal_x)**2 + (ny - goal_y)**2)
+                else:
+                    f = tentative_g + h(neighbor)
+                heappush(open_set, (f, nx, ny, neighbor, tentative_g))
+
     return []  # 경로를 찾을 수 없음
 
 # def build_flow_field(battle_map: Map, goal: Tuple[int, int]) -> np.ndarray:
@@ -329,103 +1047,200 @@ def astar_pathfinding(battle_map: Map, start: Tuple[int, int], goal: Tuple[int,
     
 #     return flow_field
 
-def build_flow_field(battle_map: Map, goal: Tuple[int, int]) -> np.ndarray:
+DISTANCE_FIELD_METHODS = ("bucket", "heap")
+DISTANCE_FIELD_DELTA = 1.0  # bucket 방식의 버킷 폭 (비용 단위)
 
-    """🟢 개선된 플로우 필드 생성"""
+
+def build_distance_field(battle_map: Map, goal, method="bucket", reverse=False) -> np.ndarray:
+    """goal 에서 모든 셀까지의 거리장 (get_neighbors 와 같은 8방향 비용 모델)
+
+    goal 은 (x, y) 하나 또는 [(x, y), ...] — 여러 개면 가장 가까운 목표까지의 거리,
+    빈 목록이면 (통과 가능한 셀이 없는 구역) 모든 셀이 inf.
+    reverse=True 면 반대 방향, 즉 각 셀에서 goal 까지의 거리 (진입 셀 비용이라 두 값은 다르다).
+
+    method
+    - "heap"  : 셀 단위 힙 Dijkstra (기존 구현, 기준용)
+    - "bucket": 버킷(Δ-stepping) 단위로 프런티어 전체를 NumPy 로 한꺼번에 완화
+    간선 비용이 모두 양수라 완화의 고정점이 하나뿐이므로 두 방식의 결과는 비트 단위로 같다.
+    """
+    if len(goal) == 0:
+        return np.full((battle_map.height, battle_map.width), np.inf)
+    goals = [tuple(goal)] if np.ndim(goal) == 1 else [tuple(g) for g in goal]
+    if method == "heap":
+        return _distance_field_heap(battle_map, goals, reverse)
+    if method == "bucket":
+        return _distance_field_bucket(battle_map, goals, reverse=reverse)
+    raise ValueError(f"unknown distance field method: {method} (expected one of {DISTANCE_FIELD_METHODS})")
+
+
+def _distance_field_heap(battle_map: Map, goals: List[Tuple[int, int]], reverse=False) -> np.ndarray:
     h, w = battle_map.height, battle_map.width
-    flow_field = np.zeros((h, w, 2), dtype=float)
     distance_field = np.full((h, w), np.inf)
-    
+    cost_map = battle_map.cost_map
+
     # Dijkstra 알고리즘으로 최단 거리 계산
     pq = []
-    goal_x, goal_y = goal
-    distance_field[goal_y, goal_x] = 0
-    heappush(pq, (0, goal_x, goal_y))
-    
+    for goal_x, goal_y in goals:
+        distance_field[goal_y, goal_x] = 0
+        heappush(pq, (0, goal_x, goal_y))
+
     while pq:
         dist, x, y = heappop(pq)
-        
+
         if dist > distance_field[y, x]:
             continue
-            
-        for nx, ny, cost in battle_map.get_neighbors(x, y):
+
+        if reverse:
+            # (nx, ny) -> (x, y) 간선: 진입 셀 (x, y) 의 비용
+            neighbors = [(x + dx, y + dy, cost_map[y, x] * base_dist) for dx, dy, base_dist in NEIGHBOR_STEPS
+                         if battle_map.is_passable(x + dx, y + dy)]
+        else:
+            neighbors = battle_map.get_neighbors(x, y)
+        for nx, ny, cost in neighbors:
             new_dist = dist + cost
             if new_dist < distance_field[ny, nx]:
                 distance_field[ny, nx] = new_dist
                 heappush(pq, (new_dist, nx, ny))
-    
-    # 🟢 개선된 방향 계산 - 더 부드러운 방향 벡터
-    for y in range(h):
-        for x in range(w):
-            if distance_field[y, x] == np.inf:
-                continue
-            
-            # # 🟢 그래디언트 기반 방향 계산 (더 부드러움)
-            # grad_x, grad_y = 0, 0
-            
-            # 🎯 핵심 수정: 목적지로의 직선 방향을 우선 고려
-            direct_dx = goal_x - x
-            direct_dy = goal_y - y
-            direct_dist = math.sqrt(direct_dx**2 + direct_dy**2)
 
-            if direct_dist == 0:
-                continue
+    return distance_field
 
-            # 직선 방향 단위 벡터
-            direct_ux = direct_dx / direct_dist
-            direct_uy = direct_dy / direct_dist
-            
-            # 🔧 그래디언트 기반 방향 계산
-            grad_x, grad_y = 0, 0
-            weight_sum = 0
-
-            # 주변 8방향의 거리 차이로 그래디언트 계산
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    if dx == 0 and dy == 0:
-                        continue
-                    
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < w and 0 <= ny < h:
-                        if distance_field[ny, nx] < distance_field[y, x]:
-                            weight = 1.0 / max(1, abs(dx) + abs(dy))  # 대각선은 가중치 낮춤
-                            grad_x += dx * weight
-                            grad_y += dy * weight
-                            weight_sum += weight
-
-            # # 방향 벡터 정규화
-            # if grad_x != 0 or grad_y != 0:
-            #     length = math.sqrt(grad_x**2 + grad_y**2)
-            #     flow_field[y, x] = [grad_x/length, grad_y/length]
-
-            # 그래디언트 방향 계산
-            if weight_sum > 0:
-                grad_x /= weight_sum
-                grad_y /= weight_sum
-                grad_length = math.sqrt(grad_x**2 + grad_y**2)
-                
-                if grad_length > 0:
-                    grad_ux = grad_x / grad_length
-                    grad_uy = grad_y / grad_length
-                    
-                    # 🎯 핵심 수정: 직선 방향과 그래디언트 방향을 혼합
-                    # 직선 방향에 70% 가중치, 그래디언트 방향에 30% 가중치
-                    final_x = direct_ux * 0.7 + grad_ux * 0.3
-                    final_y = direct_uy * 0.7 + grad_uy * 0.3
-                    
-                    # 최종 방향 정규화
-                    final_length = math.sqrt(final_x**2 + final_y**2)
-                    if final_length > 0:
-                        flow_field[y, x] = [final_x/final_length, final_y/final_length]
-                    else:
-                        flow_field[y, x] = [direct_ux, direct_uy]
-                else:
-                    # 그래디언트를 계산할 수 없으면 직선 방향 사용
-                    flow_field[y, x] = [direct_ux, direct_uy]
+
+def _distance_field_bucket(battle_map: Map, goals: List[Tuple[int, int]], delta=DISTANCE_FIELD_DELTA,
+                           reverse=False) -> np.ndarray:
+    grid = battle_map.get_path_grid()
+    cost = grid.cost  # 테두리가 inf 라 오프셋 접근에 범위 검사 불필요
+    dist = np.full(grid.size, np.inf)
+    step_costs = [(offset, cost * base_dist) for offset, _, _, base_dist in grid.neighbors]
+    if reverse:
+        # nbr -> active 간선: 진입 셀(active) 비용, 통과 불가 셀(테두리 포함)은 출발점이 될 수 없음
+        blocked = ~np.isfinite(cost)
+
+    goal_idx = np.unique([grid.index(x, y) for x, y in goals])
+    dist[goal_idx] = 0.0
+    frontier = goal_idx  # 거리가 줄었지만 아직 이웃을 완화하지 않은 셀
+    queued = np.zeros(grid.size, dtype=bool)  # 프런티어 중복 방지
+    queued[goal_idx] = True
+    threshold = delta
+
+    while frontier.size:
+        frontier_dist = dist[frontier]
+        near = frontier_dist < threshold
+        if not near.any():
+            # 현재 버킷이 비었으면 다음으로 가까운 셀 기준으로 버킷 이동
+            threshold = frontier_dist.min() + delta
+            continue
+
+        # 1) 현재 버킷의 셀들을 한꺼번에 완화
+        active = frontier[near]
+        active_dist = frontier_dist[near]
+        queued[active] = False
+        improved = [frontier[~near]]
+        for offset, step_cost in step_costs:
+            nbr = active + offset
+            if reverse:
+                cand = active_dist + step_cost[active]
+                cand[blocked[nbr]] = np.inf
             else:
-                # 그래디언트를 계산할 수 없으면 직선 방향 사용
-                flow_field[y, x] = [direct_ux, direct_uy]
-    
+                cand = active_dist + step_cost[nbr]
+            better = cand < dist[nbr]
+            if better.any():
+                nbr = nbr[better]
+                dist[nbr] = cand[better]  # 한 방향 안에서 nbr 는 중복 없음
+                # 2) 거리가 줄어든 셀은 다시 프런티어로 (같은 버킷이면 바로 다음 반복에서 처리)
+                nbr = nbr[~queued[nbr]]
+                queued[nbr] = True
+                improved.append(nbr)
+
+        frontier = np.concatenate(improved)
+
+    return dist.reshape(grid.height, grid.width)[1:-1, 1:-1].copy()
+
+
+def build_flow_field(battle_map: Map, goal: Tuple[int, int], method="bucket") -> np.ndarray:
+
+    """🟢 개선된 플로우 필드 생성"""
+    distance_field = build_distance_field(battle_map, goal, method)
+    return build_flow_directions(distance_field, goal)
+
+
+def region_cells(battle_map: Map, region) -> List[Tuple[int, int]]:
+    """region ((x0, x1), (y0, y1), 양 끝 포함) 안의 통과 가능한 셀"""
+    (x0, x1), (y0, y1) = region
+    x0, x1 = max(x0, 0), min(x1, battle_map.width - 1)
+    y0, y1 = max(y0, 0), min(y1, battle_map.height - 1)
+    ys, xs = np.nonzero(np.isfinite(battle_map.cost_map[y0:y1 + 1, x0:x1 + 1]))
+    return list(zip((xs + x0).tolist(), (ys + y0).tolist()))
+
+
+def build_region_flow_field(battle_map: Map, region, method="bucket") -> np.ndarray:
+    """목적지 구역(PLACEMENT 'dest' 사각형) 전체를 목표로 하는 플로우 필드
+
+    구역 안 모든 통과 가능 셀을 출발점으로 한 거리장 하나로,
+    같은 구역으로 가는 부대들이 목적지 셀마다 필드를 따로 만들지 않고 공유한다.
+    """
+    distance_field = build_distance_field(battle_map, region_cells(battle_map, region), method)
+    return build_flow_directions(distance_field, region=region)
+
+
+def build_flow_directions(distance_field: np.ndarray, goal: Tuple[int, int] = None, region=None) -> np.ndarray:
+    """거리장 -> 셀별 이동 방향 (배열 연산)
+
+    셀마다 거리가 더 작은 이웃 방향의 가중 평균(그래디언트)을 구하고
+    목적지 직선 방향 70% + 그래디언트 방향 30% 로 섞어 정규화한다.
+    그래디언트를 구할 수 없으면 직선 방향, 도달 불가 셀과 목적지 셀은 (0, 0).
+    region ((x0, x1), (y0, y1)) 을 주면 직선 방향은 region 안의 가장 가까운 점 기준
+    (region 안의 셀은 (0, 0)).
+    """
+    h, w = distance_field.shape
+    flow_field = np.zeros((h, w, 2), dtype=float)
+
+    # 1) 목적지로의 직선 방향
+    ys, xs = np.mgrid[0:h, 0:w]
+    if region is None:
+        goal_x, goal_y = goal
+    else:
+        (x0, x1), (y0, y1) = region
+        goal_x, goal_y = np.clip(xs, x0, x1), np.clip(ys, y0, y1)
+    direct_dx = (goal_x - xs).astype(float)
+    direct_dy = (goal_y - ys).astype(float)
+    direct_dist = np.sqrt(direct_dx**2 + direct_dy**2)
+    valid = np.isfinite(distance_field) & (direct_dist != 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        direct_ux = direct_dx / direct_dist
+        direct_uy = direct_dy / direct_dist
+
+        # 2) 주변 8방향 중 거리가 더 작은 이웃으로 그래디언트 (대각선은 가중치 0.5)
+        padded = np.full((h + 2, w + 2), np.inf)
+        padded[1:-1, 1:-1] = distance_field
+        grad_x = np.zeros((h, w))
+        grad_y = np.zeros((h, w))
+        weight_sum = np.zeros((h, w))
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                if dx == 0 and dy == 0:
+                    continue
+                lower = padded[1 + dy:h + 1 + dy, 1 + dx:w + 1 + dx] < distance_field
+                weight = 1.0 / max(1, abs(dx) + abs(dy))
+                grad_x += np.where(lower, dx * weight, 0.0)
+                grad_y += np.where(lower, dy * weight, 0.0)
+                weight_sum += np.where(lower, weight, 0.0)
+
+        grad_x /= weight_sum
+        grad_y /= weight_sum
+        grad_length = np.sqrt(grad_x**2 + grad_y**2)
+        has_grad = (weight_sum > 0) & (grad_length > 0)
+
+        # 3) 직선 방향 70% + 그래디언트 방향 30% 혼합 후 정규화
+        final_x = direct_ux * 0.7 + (grad_x / grad_length) * 0.3
+        final_y = direct_uy * 0.7 + (grad_y / grad_length) * 0.3
+        final_length = np.sqrt(final_x**2 + final_y**2)
+        use_final = has_grad & (final_length > 0)
+
+        flow_field[..., 0] = np.where(use_final, final_x / final_length, direct_ux)
+        flow_field[..., 1] = np.where(use_final, final_y / final_length, direct_uy)
+
+    flow_field[~valid] = 0.0
     return flow_field
 
 # 전술적 이동 패턴 추가
@@ -0,0 +1,139 @@
+# path_queue.py
+
+import time
+from heapq import heappush, heappop
+
+from .path_service import SUBMITTED, LOCAL, BUSY
+
+
+PATH_BUDGET_MS = 0.0  # 틱당 경로 계산 예산 (밀리초), 0 이하면 제한 없음 (기본값: 재현성을 위해 끔)
+
+
+class PathRequestQueue:
+    """틱 예산 안에서만 경로를 계산하는 요청 대기열
+
+    틱마다 이동 전에 process() 로 이전 틱에서 밀린 요청을 먼저 계산하고,
+    이동 중 새 요청은 compute_or_request() 가 예산(budget_ms)이 남아 있으면 바로 계산한다.
+    예산은 이 틱에 경로 계산에 쓴 시간으로 센다 (0 이하면 제한 없음 = 모두 바로 계산, 동기 방식과 같음).
+    예산을 넘긴 요청만 대기열에 남아 다음 틱 이동 전에 계산된다 (한 틱 지연, 틱당 최소 1건은 처리).
+    예산은 실제 경과 시간(벽시계)이라 켜면 같은 시드라도 기계 부하에 따라 결과가 달라진다.
+    - 우선순위: 따라갈 경로가 전혀 없는 부대 -> 기존 경로를 보수하는 부대, 같으면 먼저 요청한 순
+    - 같은 부대가 다시 요청하면 목적지만 최신 값으로 바꾼다 (중복 등록 없음)
+    기다리는 동안 부대는 남은 기존 경로나 직선 이동(compute_direct_velocity)으로 움직인다.
+    service (PathService) 가 있으면 무거운 작업은 워커 프로세스로 보내고 다음 틱에 받는다.
+    """
+
+    def __init__(self, budget_ms=PATH_BUDGET_MS, service=None):
+        self.budget_ms = budget_ms
+        self.service = service
+        self.heap = []
+        self.pending = {}  # troop.id -> (priority, dest, 요청 시각)
+        self.seq = 0
+        self.processed = 0
+        self.max_wait = 0.0  # 요청부터 계산까지 가장 오래 기다린 시간 (분)
+        self.tick_time = None
+        self.tick_ms = 0.0  # 이번 틱에 경로 계산에 쓴 시간
+        self.last_tick_ms = 0.0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def __contains__(self, troop):
+        return troop.id in self.pending
+
+    def request(self, troop, dest, current_time):
+        if self.service is not None and troop in self.service:
+            return  # 워커에서 계산 중 — 다음 틱에 결과 적용
+        priority = 0 if not (troop.path and troop.path_index < len(troop.path)) else 1
+        entry = self.pending.get(troop.id)
+        if entry is not None:
+            old_priority, _, requested_at = entry
+            if priority >= old_priority:
+                self.pending[troop.id] = (old_priority, dest, requested_at)
+                return
+        else:
+            requested_at = current_time
+        # 새 요청이거나 우선순위가 올라간 경우 (힙의 이전 항목은 꺼낼 때 건너뜀)
+        self.pending[troop.id] = (priority, dest, requested_at)
+        self.seq += 1
+        heappush(self.heap, (priority, self.seq, troop))
+
+    def _start_tick(self, current_time):
+        if self.tick_time != current_time:
+            self.tick_time = current_time
+            self.last_tick_ms = self.tick_ms
+            self.tick_ms = 0.0
+
+    def within_budget(self) -> bool:
+        return self.budget_ms <= 0 or self.tick_ms < self.budget_ms
+
+    def compute_or_request(self, troop, dest, battle_map, current_time):
+        """예산이 남아 있으면 바로 계산, 아니면 대기열에 등록 (다음 틱 이동 전에 계산)"""
+        self._start_tick(current_time)
+        if self.service is not None:
+            if troop in self.service:
+                return  # 워커에서 계산 중 — 다음 틱에 결과 적용
+            status = self.service.try_submit(troop, dest, battle_map, current_time)
+            if status == SUBMITTED:
+                self.pending.pop(troop.id, None)
+                self.processed += 1
+                return
+        else:
+            status = LOCAL
+        if status == BUSY or not self.within_budget():
+            self.request(troop, dest, current_time)
+            return
+
+        t0 = time.perf_counter()
+        self.pending.pop(troop.id, None)  # 이전 틱에 밀린 요청이 있으면 (힙 항목은 꺼낼 때 건너뜀)
+        troop.recalculate_path(dest, battle_map, current_time)
+        self.processed += 1
+        self.tick_ms += (time.perf_counter() - t0) * 1000
+
+    def process(self, battle_map, current_time):
+        """틱 시작 (이동 전): 워커 결과를 적용하고 밀린 요청을 예산 안에서 우선순위 순으로 계산"""
+        self._start_tick(current_time)
+        t0 = time.perf_counter()
+        if self.service is not None:
+            self.service.collect(battle_map, current_time)
+        done = 0
+        deferred = []  # 워커가 모두 바빠서 다음 틱으로 미룬 요청
+        while self.heap:
+            if done and self.budget_ms > 0 and self.tick_ms + (time.perf_counter() - t0) * 1000 >= self.budget_ms:
+                break
+            priority, seq, troop = heappop(self.heap)
+            entry = self.pending.get(troop.id)
+            if entry is None or entry[0] != priority:
+                continue  # 이미 처리했거나 더 높은 우선순위로 다시 등록된 항목
+            del self.pending[troop.id]
+            if not (troop.alive and troop.can_move):
+                continue
+
+            _, dest, requested_at = entry
+            if self.service is not None:
+                status = self.service.try_submit(troop, dest, battle_map, current_time)
+                if status == BUSY:
+                    deferred.append((troop.id, entry, (priority, seq, troop)))
+                    continue
+                if status == SUBMITTED:
+                    self.max_wait = max(self.max_wait, current_time - requested_at)
+                    self.processed += 1
+                    continue
+            troop.recalculate_path(dest, battle_map, current_time)
+            self.max_wait = max(self.max_wait, current_time - requested_at)
+            self.processed += 1
+            done += 1
+        for troop_id, entry, item in deferred:
+            self.pending[troop_id] = entry
+            heappush(self.heap, item)
+        self.tick_ms += (time.perf_counter() - t0) * 1000
+
+    def info(self) -> dict:
+        """대기열 통계 (튜닝용)"""
+        return {
+            "pending": len(self.pending),
+            "processed": self.processed,
+            "max_wait": self.max_wait,
+            "last_tick_ms": round(self.last_tick_ms, 1),
+            "budget_ms": self.budget_ms,
+        }
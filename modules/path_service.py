@@ -0,0 +1,143 @@
+# path_service.py
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+from .map import Map, astar_pathfinding
+from .hpa import hpa_pathfinding
+from .landmarks import get_landmarks
+from .road_graph import road_pathfinding
+
+
+PATH_SERVICE_TRIM = 20  # 결과 적용 시 현재 위치와 가장 가까운 셀을 찾을 경로 앞부분 길이
+
+SUBMITTED, LOCAL, BUSY = "submitted", "local", "busy"
+
+
+# ---- 워커 프로세스 ----
+_worker_map = None
+
+
+def _init_worker(filename, cache_dir, landmarks):
+    """워커마다 한 번: 지형 캐시(.npy)를 mmap 으로 열어 Map 생성 (HPA* 그래프는 워커별로 지연 생성)"""
+    global _worker_map
+    _worker_map = Map(filename, cache_dir=cache_dir)
+    if landmarks:
+        get_landmarks(_worker_map)  # 메인 프로세스가 저장한 랜드마크 거리장을 mmap 으로
+
+
+def _search_job(start, goal, road_speed_ratio) -> List[Tuple[int, int]]:
+    """먼 거리 경로 탐색 (Troop.search_path 의 도로망 / HPA* 분기와 같음)"""
+    path = road_pathfinding(_worker_map, start, goal, road_speed_ratio) if road_speed_ratio else []
+    if not path:
+        path = hpa_pathfinding(_worker_map, start, goal)
+    if not path:
+        path = astar_pathfinding(_worker_map, start, goal)
+    return path
+
+
+def _flow_job(key) -> bool:
+    """플로우 필드를 만들어 디스크 저장소에 기록 (결과는 메인 프로세스가 mmap 으로 읽음)"""
+    if isinstance(key[0], tuple):
+        _worker_map.get_region_flow_field(key)
+    else:
+        _worker_map.get_flow_field(key)
+    return True
+
+
+# ---- 메인 프로세스 ----
+class PathService:
+    """워커 프로세스 풀에서 무거운 경로 작업을 계산하는 서비스 (PathRequestQueue 에 연결)
+
+    - 먼 거리 도로망 / HPA* 탐색과 아직 없는 플로우 필드 생성만 워커로 보낸다 (Troop.path_job)
+    - 제출한 다음 틱의 process() 에서 결과를 적용한다 (그 사이 부대는 직선 이동).
+      적용 시점은 작업 시간과 관계없이 고정 (아직 안 끝났으면 그 틱에서 기다림)
+    - 워커는 지형 캐시를 mmap 으로 공유하고, 플로우 필드는 디스크 저장소로 돌려준다
+    set_cell_cost 로 비용이 바뀐 뒤에는 워커 지형과 달라지므로 모두 메인 프로세스에서 계산한다.
+    """
+
+    def __init__(self, battle_map: Map, workers: int, max_in_flight=None):
+        self.workers = workers
+        self.max_in_flight = max_in_flight or 2 * workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(battle_map.filename, battle_map.cache_dir, battle_map.landmarks is not None),
+        )
+        self.in_flight = {}  # troop.id -> (future, troop, dest, job, 제출 시각)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.last_wait_ms = 0.0
+
+    def __contains__(self, troop):
+        return troop.id in self.in_flight
+
+    def try_submit(self, troop, dest, battle_map: Map, current_time) -> str:
+        """SUBMITTED: 워커로 보냄 / LOCAL: 바로 계산할 것 / BUSY: 대기열에 남겨 둘 것"""
+        if battle_map.cost_version != 0:
+            return LOCAL
+        job = troop.path_job(dest, battle_map)
+        if job is None or (job[0] == "flow" and not battle_map.use_cache):
+            return LOCAL
+        if len(self.in_flight) >= self.max_in_flight:
+            return BUSY
+
+        if job[0] == "flow":
+            future = self.executor.submit(_flow_job, job[1])
+        else:
+            future = self.executor.submit(_search_job, *job[1:])
+        self.in_flight[troop.id] = (future, troop, dest, job, current_time)
+        self.submitted += 1
+        return SUBMITTED
+
+    def collect(self, battle_map: Map, current_time):
+        """이전 틱에 제출한 작업의 결과를 받아 적용 (아직 안 끝났으면 기다림)"""
+        t0 = time.perf_counter()
+        for troop_id, (future, troop, dest, job, submitted_at) in list(self.in_flight.items()):
+            if submitted_at >= current_time:
+                continue
+            del self.in_flight[troop_id]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[PathService] {job[0]} job failed for troop {troop_id}: {e}")
+                self.failed += 1
+                result = None
+            self.completed += 1
+            if not (troop.alive and troop.can_move):
+                continue
+
+            if job[0] == "search" and result:
+                search_goal, roads = job[2], job[3]
+                battle_map.path_cache.put(search_goal, result, roads)
+                troop.planner = None
+                troop.set_path(self.trim(result, troop), (int(dest.x), int(dest.y)),
+                               battle_map, current_time)
+            else:
+                # 플로우 필드는 디스크에 저장됐으므로 로드만 / 실패한 작업은 직접 계산
+                troop.recalculate_path(dest, battle_map, current_time)
+        self.last_wait_ms = (time.perf_counter() - t0) * 1000
+
+    @staticmethod
+    def trim(path, troop) -> List[Tuple[int, int]]:
+        """기다리는 동안 이동한 만큼 경로 앞부분 제거"""
+        x, y = troop.coord.x, troop.coord.y
+        head = path[:PATH_SERVICE_TRIM]
+        nearest = min(range(len(head)), key=lambda i: (head[i][0] - x)**2 + (head[i][1] - y)**2)
+        return path[nearest:]
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.in_flight.clear()
+
+    def info(self) -> dict:
+        """서비스 통계 (튜닝용)"""
+        return {
+            "workers": self.workers,
+            "in_flight": len(self.in_flight),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "last_wait_ms": round(self.last_wait_ms, 1),
+        }
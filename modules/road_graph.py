@@ -0,0 +1,267 @@
+# road_graph.py
+
+import math
+from heapq import heappush, heappop
+from typing import List, Tuple
+
+import numpy as np
+
+from .map import Map, NEIGHBOR_STEPS, astar_pathfinding
+
+
+ROAD_MIN_DISTANCE = 150  # 이 거리(셀) 이상 이동만 도로망 사용
+ROAD_RAMP_RADIUS = 40  # 출발/도착 지점에서 진입/진출 도로 셀을 찾을 반경 (셀)
+ROAD_DETOUR_FACTOR = 1.2  # 야지 경로 길이 추정 (직선 거리의 배수) — 도로 경로 이동 시간과 비교
+
+
+def skeletonize(mask: np.ndarray) -> np.ndarray:
+    """Zhang-Suen 세선화 — 두께가 있는 도로 픽셀을 1 픽셀 중심선으로 (배열 연산)"""
+    img = np.pad(np.asarray(mask, dtype=np.uint8), 1)
+    center = img[1:-1, 1:-1]
+    # P2(북)부터 시계 방향 P3..P9
+    p2, p3, p4, p5 = img[:-2, 1:-1], img[:-2, 2:], img[1:-1, 2:], img[2:, 2:]
+    p6, p7, p8, p9 = img[2:, 1:-1], img[2:, :-2], img[1:-1, :-2], img[:-2, :-2]
+    ring = (p2, p3, p4, p5, p6, p7, p8, p9, p2)
+
+    while True:
+        changed = False
+        for step in (0, 1):
+            count = sum(p.astype(np.int8) for p in ring[:8])
+            transitions = sum(((a == 0) & (b == 1)).astype(np.int8) for a, b in zip(ring[:8], ring[1:]))
+            if step == 0:
+                side = ((p2 & p4 & p6) == 0) & ((p4 & p6 & p8) == 0)
+            else:
+                side = ((p2 & p4 & p8) == 0) & ((p2 & p6 & p8) == 0)
+            delete = (center == 1) & (count >= 2) & (count <= 6) & (transitions == 1) & side
+            if delete.any():
+                center[delete] = 0
+                changed = True
+        if not changed:
+            return center.astype(bool)
+
+
+class RoadGraph:
+    """road_mask 중심선(skeleton)으로 만든 도로망 그래프
+
+    - 노드: 이웃 도로 셀이 2개가 아닌 셀 (교차로, 도로 끝)
+    - 간선: 노드 사이 중심선 셀 목록과 방향별 비용 (A* 와 같은 비용 모델: 진입 셀 비용 x 거리 가중치)
+    먼 이동은 출발/도착 근처의 진입(on-ramp)/진출(off-ramp) 셀 사이를 그래프에서 찾고,
+    양 끝 구간만 셀 단위 A* 로 잇는다.
+    """
+
+    def __init__(self, battle_map: Map):
+        self.map = battle_map
+        self.cost_map = np.asarray(battle_map.cost_map)
+        self.skeleton = skeletonize(np.asarray(battle_map.road_mask, dtype=bool) & np.isfinite(self.cost_map))
+        ys, xs = np.nonzero(self.skeleton)
+        self.cell_xs, self.cell_ys = xs, ys  # 진입/진출 셀 검색용
+
+        self.nodes = []  # node id -> (x, y)
+        self.node_of_cell = {}  # (x, y) -> node id
+        self.edges = []  # edge id -> (a, b, 셀 목록, 정방향 누적 비용, 역방향 누적 비용)
+        self.adjacency = []  # node id -> [(edge id, 다른 끝 node id)]
+        self.edge_of_cell = {}  # 간선 내부 셀 (x, y) -> (edge id, 셀 위치)
+
+        self.build()
+
+    # ---- 그래프 구성 ----
+    def road_neighbors(self, x, y) -> List[Tuple[int, int]]:
+        h, w = self.skeleton.shape
+        return [(x + dx, y + dy) for dx, dy, _ in NEIGHBOR_STEPS
+                if 0 <= x + dx < w and 0 <= y + dy < h and self.skeleton[y + dy, x + dx]]
+
+    def _add_node(self, cell) -> int:
+        node = len(self.nodes)
+        self.nodes.append(cell)
+        self.node_of_cell[cell] = node
+        self.adjacency.append([])
+        return node
+
+    def _add_edge(self, cells):
+        """cells[0], cells[-1] 이 노드인 중심선 구간을 간선으로 등록"""
+        forward, backward = [0.0], [0.0]
+        for (x0, y0), (x1, y1) in zip(cells, cells[1:]):
+            base_dist = 1.15 if x0 != x1 and y0 != y1 else 1.0
+            forward.append(forward[-1] + float(self.cost_map[y1, x1]) * base_dist)
+            backward.append(backward[-1] + float(self.cost_map[y0, x0]) * base_dist)
+        a, b = self.node_of_cell[cells[0]], self.node_of_cell[cells[-1]]
+        edge = len(self.edges)
+        # backward[i] = cells[0..i] 를 거꾸로 (i -> 0) 가는 비용
+        self.edges.append((a, b, cells, forward, backward))
+        self.adjacency[a].append((edge, b))
+        if b != a:
+            self.adjacency[b].append((edge, a))
+        for i, cell in enumerate(cells[1:-1], 1):
+            self.edge_of_cell[cell] = (edge, i)
+
+    def build(self):
+        cells = list(zip(self.cell_xs.tolist(), self.cell_ys.tolist()))
+        for cell in cells:
+            if len(self.road_neighbors(*cell)) != 2:
+                self._add_node(cell)
+
+        visited = set()  # 간선에 포함된 중간 셀
+        for start in list(self.node_of_cell):
+            for nxt in self.road_neighbors(*start):
+                if nxt in self.node_of_cell:
+                    # 노드끼리 바로 붙어 있는 경우 (한 번만 등록)
+                    if start < nxt:
+                        self._add_edge([start, nxt])
+                    continue
+                if nxt in visited:
+                    continue
+                self._add_edge(self._trace(start, nxt, visited))
+
+        # 노드 없는 고리 도로: 임의의 셀을 노드로 삼아 한 바퀴 간선
+        for cell in cells:
+            if cell not in self.node_of_cell and cell not in visited:
+                self._add_node(cell)
+                nxt = self.road_neighbors(*cell)[0]
+                self._add_edge(self._trace(cell, nxt, visited))
+
+    def _trace(self, start, nxt, visited) -> List[Tuple[int, int]]:
+        """노드 start 에서 nxt 방향으로 다음 노드까지 중심선 셀 추적"""
+        path = [start]
+        prev, current = start, nxt
+        while current not in self.node_of_cell:
+            visited.add(current)
+            path.append(current)
+            candidates = [c for c in self.road_neighbors(*current) if c != prev and c not in visited]
+            if not candidates:
+                # 출발 노드로 돌아오는 고리
+                candidates = [start] if start in self.road_neighbors(*current) else []
+                if not candidates:
+                    break
+            # 노드가 이웃에 있으면 먼저 (교차로에서 옆 셀로 새지 않도록)
+            prev, current = current, next((c for c in candidates if c in self.node_of_cell), candidates[0])
+        path.append(current)
+        if current not in self.node_of_cell:
+            self._add_node(current)
+        return path
+
+    # ---- 질의 ----
+    def nearest_cell(self, x, y, radius=ROAD_RAMP_RADIUS):
+        """반경 안에서 가장 가까운 중심선 셀, 없으면 None"""
+        if not len(self.cell_xs):
+            return None
+        d2 = (self.cell_xs - x)**2 + (self.cell_ys - y)**2
+        i = int(d2.argmin())
+        if d2[i] > radius * radius:
+            return None
+        return (int(self.cell_xs[i]), int(self.cell_ys[i]))
+
+    def _attach(self, cell, leaving: bool):
+        """중심선 셀 -> [(node, 셀과 노드 사이 비용, 셀 목록)] (leaving: 셀에서 노드로 가는 방향)"""
+        if cell in self.node_of_cell:
+            return [(self.node_of_cell[cell], 0.0, [cell])]
+        edge, i = self.edge_of_cell[cell]
+        a, b, cells, forward, backward = self.edges[edge]
+        if leaving:
+            # cell -> a: 역방향, cell -> b: 정방향
+            return [(a, backward[i], cells[i::-1]), (b, forward[-1] - forward[i], cells[i:])]
+        # a -> cell: 정방향, b -> cell: 역방향
+        return [(a, forward[i], cells[:i + 1]), (b, backward[-1] - backward[i], cells[:i - 1:-1])]
+
+    def road_path(self, on_ramp, off_ramp) -> List[Tuple[int, int]]:
+        """진입 셀 -> 진출 셀 도로 경로 (중심선 셀 목록), 연결되지 않았으면 []"""
+        if on_ramp == off_ramp:
+            return [on_ramp]
+        if on_ramp in self.edge_of_cell and off_ramp in self.edge_of_cell:
+            edge, i = self.edge_of_cell[on_ramp]
+            edge_off, j = self.edge_of_cell[off_ramp]
+            if edge == edge_off:
+                cells = self.edges[edge][2]
+                return cells[i:j + 1] if i <= j else cells[i:j - 1:-1]
+
+        # 진입 셀에서 양 끝 노드로 출발하는 다중 시작점 Dijkstra (노드 단위)
+        dist, parent, heap = {}, {}, []
+        for node, cost, cells in self._attach(on_ramp, leaving=True):
+            if cost < dist.get(node, math.inf):
+                dist[node] = cost
+                parent[node] = (None, cells)
+                heappush(heap, (cost, node))
+        arrivals = {node: (cost, cells) for node, cost, cells in self._attach(off_ramp, leaving=False)}
+
+        best, best_node = math.inf, None
+        while heap:
+            d, node = heappop(heap)
+            if d > dist[node]:
+                continue
+            if d >= best:
+                break
+            if node in arrivals and d + arrivals[node][0] < best:
+                best, best_node = d + arrivals[node][0], node
+            for edge, other in self.adjacency[node]:
+                a, b, cells, forward, backward = self.edges[edge]
+                if node == a:
+                    nd, segment = d + forward[-1], cells
+                else:
+                    nd, segment = d + backward[-1], cells[::-1]
+                if nd < dist.get(other, math.inf):
+                    dist[other] = nd
+                    parent[other] = (node, segment)
+                    heappush(heap, (nd, other))
+        if best_node is None:
+            return []
+
+        # 노드 경로 복원 (간선 셀 목록 이어 붙이기, 이음새 셀 중복 제거)
+        segments = [arrivals[best_node][1]]
+        node = best_node
+        while node is not None:
+            prev, segment = parent[node]
+            segments.append(segment)
+            node = prev
+        path = []
+        for segment in reversed(segments):
+            path.extend(segment[1:] if path and path[-1] == segment[0] else segment)
+        return path
+
+    def route(self, start: Tuple[int, int], goal: Tuple[int, int], speed_ratio=1.0) -> List[Tuple[int, int]]:
+        """start -> 진입 셀 (A*) -> 도로망 -> 진출 셀 -> goal (A*)
+
+        speed_ratio = 도로 속도 / 야지 속도. 야지 거리로 환산한 도로 경로 길이
+        (진입/진출 구간 + 도로 구간 / speed_ratio) 가 야지 경로 추정 길이보다 길면
+        (도로가 멀거나 우회가 큼) [].
+        """
+        on_ramp = self.nearest_cell(*start)
+        off_ramp = self.nearest_cell(*goal)
+        if on_ramp is None or off_ramp is None:
+            return []
+        road = self.road_path(on_ramp, off_ramp)
+        if not road:
+            return []
+        road_time = (math.dist(start, on_ramp) + math.dist(off_ramp, goal)
+                     + path_length(road) / speed_ratio)
+        if road_time > ROAD_DETOUR_FACTOR * math.dist(start, goal):
+            return []
+
+        head = astar_pathfinding(self.map, start, on_ramp)
+        tail = astar_pathfinding(self.map, off_ramp, goal)
+        if not head or not tail:
+            return []
+        return head[:-1] + road + tail[1:]
+
+    def info(self) -> dict:
+        return {
+            "cells": len(self.cell_xs),
+            "nodes": len(self.nodes),
+            "edges": len(self.edges),
+        }
+
+
+def path_length(path) -> float:
+    """셀 경로의 길이 (셀, 대각선 sqrt(2))"""
+    return sum(math.hypot(x1 - x0, y1 - y0) for (x0, y0), (x1, y1) in zip(path, path[1:]))
+
+
+def get_road_graph(battle_map: Map) -> RoadGraph:
+    """Map 당 한 번 생성 (비용이 바뀌면 Map.set_cell_cost 가 버림)"""
+    if battle_map.road_graph is None:
+        battle_map.road_graph = RoadGraph(battle_map)
+    return battle_map.road_graph
+
+
+def road_pathfinding(battle_map: Map, start: Tuple[int, int], goal: Tuple[int, int],
+                     speed_ratio=1.0) -> List[Tuple[int, int]]:
+    """도로망 경로 (진입/진출 구간만 셀 단위 A*), 도로망이 더 느리거나 쓸 수 없으면 []"""
+    return get_road_graph(battle_map).route(start, goal, speed_ratio)
@@ -0,0 +1,124 @@
+# terrain_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+
+TERRAIN_CACHE_DIR = "map/cache"  # 지형 캐시 기본 위치
+TERRAIN_CACHE_VERSION = 1  # grid / cost_map 생성 규칙이 바뀌면 올릴 것
+FIELD_CACHE_VERSION = 1  # 거리장 / 플로우 필드 생성 규칙이 바뀌면 올릴 것
+
+# 캐시에 저장되는 배열 레이어 (파일 이름 = 레이어 이름 + .npy)
+TERRAIN_LAYERS = (
+    "dem", "aspect", "slope",
+    "road_mask", "lake_mask", "stream_mask", "wood_mask",
+    "transform",
+    "grid", "cost_map",
+)
+
+
+def terrain_cache_key(filename, terrain_cost) -> str:
+    """원본 npz 내용 + terrain_cost 테이블로 캐시 키(sha1) 생성"""
+    h = hashlib.sha1()
+    h.update(f"v{TERRAIN_CACHE_VERSION}".encode())
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    # inf 는 JSON 표준이 아니므로 repr 로 고정
+    table = {str(k): repr(float(v)) for k, v in sorted(terrain_cost.items())}
+    h.update(json.dumps(table, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def terrain_cache_path(cache_dir, key) -> str:
+    return os.path.join(cache_dir, f"terrain_{key}")
+
+
+def load_terrain_cache(cache_dir, key):
+    """캐시가 있으면 레이어를 mmap(읽기 전용)으로 열어 반환, 없으면 None"""
+    path = terrain_cache_path(cache_dir, key)
+    meta_file = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_file):
+        return None
+
+    with open(meta_file, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    layers = {}
+    for name in TERRAIN_LAYERS:
+        layers[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+    return layers, meta
+
+
+def save_terrain_cache(cache_dir, key, layers: dict, meta: dict):
+    """레이어를 비압축 .npy 로 저장 (임시 폴더에 쓴 뒤 rename 으로 교체)"""
+    path = terrain_cache_path(cache_dir, key)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    for name in TERRAIN_LAYERS:
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(layers[name]))
+    # meta.json 이 마지막에 생성되어야 load_terrain_cache 가 완성된 캐시만 읽는다
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # 다른 프로세스가 먼저 만든 경우
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return path
+
+
+# ---- 비용 격자별 필드 저장소: <cache_dir>/flow/<cost_map 해시>/<이름>.npy ----
+def cost_map_hash(cost_map) -> str:
+    """cost_map 내용 해시 (필드 저장소 폴더 이름)"""
+    h = hashlib.sha1()
+    h.update(f"v{FIELD_CACHE_VERSION}".encode())
+    h.update(str(cost_map.shape).encode())
+    h.update(np.ascontiguousarray(cost_map, dtype=float).tobytes())
+    return h.hexdigest()[:16]
+
+
+def field_cache_path(cache_dir, cost_hash, name) -> str:
+    return os.path.join(cache_dir, "flow", cost_hash, f"{name}.npy")
+
+
+def has_field(cache_dir, cost_hash, name) -> bool:
+    return os.path.exists(field_cache_path(cache_dir, cost_hash, name))
+
+
+def load_field(cache_dir, cost_hash, name):
+    """저장된 필드를 mmap(읽기 전용)으로 열어 반환, 없으면 None"""
+    path = field_cache_path(cache_dir, cost_hash, name)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode="r")
+
+
+def save_field(cache_dir, cost_hash, name, field):
+    """필드를 비압축 .npy 로 저장 (임시 파일에 쓴 뒤 교체 — 동시에 실행된 다른 프로세스와 충돌 없음)"""
+    path = field_cache_path(cache_dir, cost_hash, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(field))
+    os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == "__main__":
+    # 1회 변환: python -m modules.terrain_cache [npz 경로]
+    import sys
+    from .map import Map
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else "map/golan_full_dataset_cropped.npz"
+    battle_map = Map(filename)
+    print("Terrain cache:", terrain_cache_path(battle_map.cache_dir, battle_map.cache_key))
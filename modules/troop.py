@@ -7,7 +7,13 @@ from .map import Coord, Velocity, Map, MAX_TIME, TIME_STEP
 from .unit_definitions import UnitStatus, UnitType, UnitComposition, HitState, UNIT_SPECS, get_landing_data, AMMUNITION_DATABASE, AmmunitionInfo, SUPPLY_DATABASE
 
 #!TEMP >>>>
-from .map import astar_pathfinding, TacticalManager, build_flow_field
+from .map import astar_pathfinding, TacticalManager, direction_at
+from .hpa import hpa_pathfinding, HPA_MIN_DISTANCE
+from .road_graph import road_pathfinding, ROAD_MIN_DISTANCE
+from .dstar_lite import DStarLite
+from .path_queue import PathRequestQueue
+from .troop_store import TroopStore, StoreBacked, ObservedSet
+from .engagement import EngagementMatrix
 from typing import List, Tuple, Optional
 #!TEMP <<<<
 
@@ -15,17 +21,24 @@ BLUE_RANGE_BUFF = 1.2  # BLUE 진영의 사거리 버프 (20% 증가)
 BLUE_HIT_PROB_BUFF = 0.8  # BLUE 진영의 명중 확률 버프
 BLUE_OBS_BUFF = 1.2  # BLUE 진영의 관측 버프 (1.5배 더 관측 가능)
 # RED_RANGE_BUFF = 0.8  # RED 진영의 사거리 버프 (기본값, 0% 증가)
-PATHFIND_COOLDOWN = 30.0  # A* 경로 재계산 쿨타임 (초 단위)
+PATHFIND_COOLDOWN = 30.0  # 경로 유효성 점검 주기 (초 단위) — 바뀐 게 없으면 재계산하지 않음
+PATH_DRIFT_TOLERANCE = 5.0  # 현재 웨이포인트에서 이 거리(셀) 이상 벗어나면 경로 보수
+GOAL_MOVE_TOLERANCE = 3.0  # 목표가 이 거리(셀) 이상 움직이면 경로 보수
 
-class Troop:  # Troop class to store troop information and actions
+class Troop(StoreBacked):  # Troop class to store troop information and actions
     # Static variables to keep track of troop IDs
     counter = {}
+    # 위치/속도/생존/활성/사격 시각/표적은 열 저장소의 한 행 (troop_store.StoreBacked 속성)
 
-    def __init__(self, unit_name, coord=Coord(), affiliation: str = None, phase: str = None, fixed_dest=None):
+    def __init__(self, unit_name, coord=Coord(), affiliation: str = None, phase: str = None, fixed_dest=None,
+                 dest_region=None, store: TroopStore = None):
         spec = UNIT_SPECS[unit_name]
         self.spec = spec
         self.team = spec.team
         self.type = spec.unit_type
+        # 시뮬레이션 저장소가 없으면 1행짜리 저장소 (TroopList 가 자기 저장소로 옮김)
+        self.store = store if store is not None else TroopStore(capacity=1)
+        self.row = self.store.add(self)
         self.name = spec.name
         self.range_km = spec.range_km
         if self.team == "blue":
@@ -52,6 +65,7 @@ class Troop:  # Troop class to store troop information and actions
         self.affiliation = affiliation
         self.phase = phase
         self.fixed_dest = fixed_dest  # Fixed dest, Coordinate object to store (x, y, z) coordinates
+        self.dest_region = dest_region  # fixed_dest 가 속한 목적지 구역 ((x0, x1), (y0, y1)), 없으면 None
 
         # self.ammo = 100  # ammo level (0-100%)
         # self.supply = 100  # supply level (0-100%)
@@ -76,6 +90,9 @@ class Troop:  # Troop class to store troop information and actions
         self.path = []  # A* 경로
         self.path_index = 0
         self.last_pathfind_time = 0
+        self.path_goal = None  # 경로를 계산할 때의 목표 셀
+        self.path_cost_version = 0  # 경로를 계산할 때의 Map.cost_version
+        self.planner = None  # 증분 경로 계획기 (DStarLite, A* 구간에서만 사용)
         #!TEMP <<<<
 
     def dead(self):
@@ -98,12 +115,27 @@ class Troop:  # Troop class to store troop information and actions
         self.velocity = new_velocity
 
     def get_distance(self, other_troop):  # Calculate distance to another troop
+        # 이번 틱의 교전 행렬에 있는 적-아군 쌍이면 조회만
+        engagement = self.store.engagement
+        if engagement is not None:
+            distance = engagement.get(self, other_troop)
+            if distance is not None:
+                return distance
         return math.sqrt(
             (self.coord.x - other_troop.coord.x) ** 2
             + (self.coord.y - other_troop.coord.y) ** 2
             + (self.coord.z - other_troop.coord.z) ** 2
         ) * 0.01 # pixel -> km 변환 (10m = 0.01km)
 
+    def in_fire_range(self, other_troop) -> bool:
+        """other_troop 이 사거리 안인지 (이번 틱 교전 행렬의 사격 마스크, 없는 쌍이면 거리로 계산)"""
+        engagement = self.store.engagement
+        if engagement is not None:
+            in_range = engagement.can_fire(self, other_troop)
+            if in_range is not None:
+                return in_range
+        return self.get_distance(other_troop) <= self.range_km
+
     # def get_distance(self, other_troop):
     #     """최적화된 3D 거리 계산 - 권장 버전"""
     #     dx = (self.coord.x - other_troop.coord.x) * 10
@@ -226,43 +258,62 @@ class Troop:  # Troop class to store troop information and actions
         else:
             return sorted(cand_list, key=lambda c: (c[2], c[1]))
 
-    def find_observed_enemies(self, troop_list, battle_map: Map):
-        """🟢 관측 가능한 적군 필터링"""
+    def get_observation_range(self):
+        """관측 범위 (km)"""
         if self.team == "blue":
             # 블루팀은 1.5배 관측 가능
-            range_km = self.range_km * BLUE_OBS_BUFF
+            return self.range_km * BLUE_OBS_BUFF
+        # 레드팀은 기본 관측 범위
+        return self.range_km
+
+    def find_observed_enemies(self, troop_list, battle_map: Map, rows: List[int] = None):
+        """🟢 관측 가능한 적군 필터링
+
+        rows: 판정할 적 행 번호 (update_observation 이 바뀐 쌍만 골라 넘김), 없으면 관측 범위 전체
+        """
+        if self.team == "blue":
             observed_enemies = troop_list.red_observed
-            enemies = troop_list.red_troops
         if self.team == "red":
-            # 레드팀은 기본 관측 범위
-            range_km = self.range_km
             observed_enemies = troop_list.blue_observed
-            enemies = troop_list.blue_troops
 
-        for troop in enemies:
-            if troop in observed_enemies:
-                if troop.active == False or troop.alive == False:
-                    observed_enemies.remove(troop)
-                else:
-                    continue  # 이미 관측된 적은 무시
-            else:
-                # 관측 범위 내 적군만 필터링
-                if troop.active and troop.alive:
-                    distance = self.get_distance(troop)
-                    if distance <= range_km:
-                        if battle_map.is_visible(self.coord, troop.coord):
-                            observed_enemies.append(troop)
+        # 관측 범위 (BLUE_OBS_BUFF 포함) 내 살아 있는 적군만 교전 행렬에서 조회
+        # (죽은 관측 대상은 update_observation 에서 정리)
+        store = troop_list.store
+        if rows is None:
+            rows, _ = store.engagement.enemies_in_range(self, observe=True)
+            rows = rows[store.live()[rows]]
+        # 적 팀 목록(섞인 순서) 순으로 판정 — 관측 목록의 추가 순서가 표적 선택의 동점 처리 순서
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[np.argsort(troop_list.list_position[rows], kind="stable")].tolist()
+        troop_list.observation_checks += len(rows)
+        candidates = []
+        for row in rows:
+            troop = store.troops[row]
+            if troop not in observed_enemies:  # 이미 관측된 적은 무시
+                candidates.append(troop)
+
+        # 시야(LOS) 판정은 후보 전체를 한 번에 계산
+        # (관측자 셀의 뷰쉐드가 미리 계산돼 있으면 배열 조회, 없으면 LOS 메모 + 광선 검사)
+        if candidates:
+            visible = battle_map.visible_many(
+                self.coord,
+                [troop.coord.x for troop in candidates],
+                [troop.coord.y for troop in candidates],
+            )
+            for troop, is_visible in zip(candidates, visible):
+                if is_visible:
+                    observed_enemies.add(troop)
         return
 
     def assign_target(
-        self, current_time, enemy_list
+        self, current_time, enemy_list, live: List[bool] = None
     ):  # TODO: Implement target assignment logic, indirect fire logic
+        # live: 행별 생존/활성 (TroopList.assign_targets 가 한 번 계산해 넘김, 없으면 부대별로 확인)
 
         #!TEMP 이미 좋은 타겟이 있으면 그대로 유지 >>>>
         if (self.target and self.target.alive and 
             getattr(self.target, 'active', False)):
-            distance = self.get_distance(self.target)
-            if distance <= self.range_km:
+            if self.in_fire_range(self.target):
                 return  # 기존 타겟 유지 - 계산 생략!        
         #!TEMP 이미 좋은 타겟이 있으면 그대로 유지 <<<<
 
@@ -270,20 +321,30 @@ class Troop:  # Troop class to store troop information and actions
         is_night = 360 <= current_time % 1440 <= 1080
 
         if enemy_list:
-            # 거리 계산 포함 유효 후보 필터링
+            # 거리 계산 포함 유효 후보 필터링 (교전 행렬이 있으면 사격 마스크로 사거리 안의 적만 조회)
+            engagement = self.store.engagement
+            if engagement is not None and isinstance(enemy_list, ObservedSet):
+                rows, distances = engagement.enemies_in_range(self)
+                keep = enemy_list.row_mask()[rows]
+                rows, distances = rows[keep], distances[keep]
+                # enemy_list 순서대로 (filter_priority 의 안정 정렬 동점 처리가 목록 순서를 따름)
+                order = np.argsort(enemy_list.order[rows], kind="stable")
+                troops = self.store.troops
+                in_range = [(troops[r], d) for r, d in zip(rows[order].tolist(), distances[order].tolist())]
+            else:
+                if engagement is not None:
+                    distances = engagement.distances_from(self).tolist()
+                else:
+                    distances = self.store.distances_from(self.row).tolist()
+                in_range = [(e, distances[e.row]) for e in enemy_list]
             candidates = []
-            for e in enemy_list:
-                if not e.alive:
+            for e, distance in in_range:
+                #!TEMP 추가: active=False인 적은 타겟 대상에서 제외
+                if not (live[e.row] if live is not None else e.alive and e.active):
                     continue
                 if e.status == UnitStatus.HIDDEN:
                     continue
 
-                #!TEMP 추가: active=False인 적은 타겟 대상에서 제외
-                if not getattr(e, 'active', False):
-                    continue
-
-                distance = self.get_distance(e)
-
                 if distance > self.range_km:  #TODO: 사거리 제한
                     continue
 
@@ -376,7 +437,7 @@ class Troop:  # Troop class to store troop information and actions
 
         distance = self.get_distance(self.target)
 
-        if distance > self.range_km:  #TODO: 사거리 제한
+        if not self.in_fire_range(self.target):  #TODO: 사거리 제한
             # self.next_fire_time = round(current_time + self.get_t_f(), 2)
             self.assign_target(current_time, enemy_list)
             return
@@ -458,18 +519,32 @@ class Troop:  # Troop class to store troop information and actions
                 self.assign_target(current_time, enemy_list)
                 return
 
-    def compute_velocity_advanced(self, dest, battle_map: Map, current_time: float):
-        """🟢 개선된 이동 계산 - 직선 통과 없이"""
+    def compute_velocity_advanced(self, dest, battle_map: Map, current_time: float,
+                                  path_queue: PathRequestQueue = None):
+        """🟢 개선된 이동 계산 - 직선 통과 없이
+
+        path_queue 가 있으면 틱 예산이 남아 있을 때만 바로 계산하고, 넘으면 대기열에 요청만 한다
+        (계산되기 전까지는 남은 기존 경로 또는 직선 이동).
+        """
 
         # 1. 경로 재계산 조건 확인
         should_recalculate = (
             not self.path
-            or current_time - self.last_pathfind_time > PATHFIND_COOLDOWN
             or self.path_index >= len(self.path)
         )
 
+        # 점검 주기마다: 목표 이동 / 비용 변경 / 경로 이탈이 있을 때만 보수
+        if not should_recalculate and current_time - self.last_pathfind_time > PATHFIND_COOLDOWN:
+            if self.path_is_stale(dest, battle_map):
+                should_recalculate = True
+            else:
+                self.last_pathfind_time = current_time
+
         if should_recalculate:
-            self.recalculate_path(dest, battle_map, current_time)
+            if path_queue is None:
+                self.recalculate_path(dest, battle_map, current_time)
+            else:
+                path_queue.compute_or_request(self, dest, battle_map, current_time)
 
         # 2. 경로가 있으면 경로 따라가기
         if self.path and self.path_index < len(self.path):
@@ -513,9 +588,33 @@ class Troop:  # Troop class to store troop information and actions
 
         # 🟢 항상 경로탐색 사용 (직선 통과 체크 제거)
         if self.should_use_flow_field(battle_map):
-            self.path = self.get_flow_field_path(goal, battle_map)
+            self.planner = None
+            path = self.get_flow_field_path(goal, battle_map)
         else:
-            self.path = astar_pathfinding(battle_map, start, goal)
+            # 갈 수 없는 목표(호수 등)는 도달 가능한 가장 가까운 셀로 옮겨서 탐색
+            search_goal = battle_map.snap_to_reachable(start, goal) or goal
+
+            if distance_to_goal >= HPA_MIN_DISTANCE:
+                # 먼 목표: 같은 목표로 가는 근처 부대의 경로가 있으면 연결 경로만 탐색
+                # (도로망 경로는 부대의 도로 속도 비율마다 따로 저장)
+                mode = self.route_mode(distance_to_goal)
+                path = battle_map.path_cache.lookup(battle_map, start, search_goal, mode)
+                if path:
+                    self.planner = None
+                else:
+                    path = self.search_path(start, search_goal, distance_to_goal, battle_map)
+                    battle_map.path_cache.put(search_goal, path, mode)
+            else:
+                # 가까운 목표는 캐시 없이 증분 계획기 (비용 변경 시 보수)
+                path = self.search_path(start, search_goal, distance_to_goal, battle_map)
+
+        self.set_path(path, goal, battle_map, current_time)
+
+    def set_path(self, path, goal, battle_map: Map, current_time: float):
+        """새 경로 적용 (목표 / 비용 버전 기록, 웨이포인트 정리)"""
+        self.path = path
+        self.path_goal = goal
+        self.path_cost_version = battle_map.cost_version
 
         # 🟢 경로 후처리: 너무 가까운 웨이포인트 제거
         if self.path:
@@ -524,6 +623,91 @@ class Troop:  # Troop class to store troop information and actions
         self.path_index = 0
         self.last_pathfind_time = current_time
 
+    def flow_field_key(self, goal):
+        """get_flow_field_path 가 쓸 플로우 필드 키 (목적지 구역 또는 목표 셀, 구역 안이면 None — A* 사용)"""
+        if self.fixed_dest is not None and self.dest_region is not None:
+            (x0, x1), (y0, y1) = self.dest_region
+            if x0 <= int(self.coord.x) <= x1 and y0 <= int(self.coord.y) <= y1:
+                return None
+            return self.dest_region
+        return goal
+
+    def path_job(self, dest, battle_map: Map):
+        """워커 프로세스로 넘길 수 있는 무거운 경로 작업 (path_service 참고)
+
+        - ("flow", key): 아직 메모리/디스크에 없는 플로우 필드 생성
+        - ("search", start, goal, 도로 속도 비율 또는 None): 캐시에 없는 먼 거리(도로망 / HPA*) 경로 탐색
+        가까운 거리(증분 계획기), 캐시 적중 등 바로 계산해도 가벼운 경우는 None.
+        """
+        start = (int(self.coord.x), int(self.coord.y))
+        goal = (int(dest.x), int(dest.y))
+        distance_to_goal = math.hypot(goal[0] - start[0], goal[1] - start[1])
+        if distance_to_goal < 3:
+            return None
+
+        if self.should_use_flow_field(battle_map):
+            key = self.flow_field_key(goal)
+            if key is None or battle_map.has_flow_field(key):
+                return None
+            return ("flow", key)
+
+        if distance_to_goal < HPA_MIN_DISTANCE:
+            return None
+        search_goal = battle_map.snap_to_reachable(start, goal) or goal
+        roads = self.route_mode(distance_to_goal)
+        if battle_map.path_cache.nearest(start, search_goal, roads) is not None:
+            return None
+        return ("search", start, search_goal, roads)
+
+    def road_speed_ratio(self) -> float:
+        """도로 속도 / 야지 속도 (1 보다 크면 먼 이동에 도로망 경로 사용)"""
+        return self.spec.speed_road_kmh / self.spec.speed_offroad_kmh
+
+    def route_mode(self, distance_to_goal):
+        """search_path 가 도로망 경로를 먼저 시도하면 도로 속도 비율, 아니면 None (경로 캐시 키에 사용)"""
+        speed_ratio = self.road_speed_ratio()
+        return speed_ratio if distance_to_goal >= ROAD_MIN_DISTANCE and speed_ratio > 1 else None
+
+    def search_path(self, start, goal, distance_to_goal, battle_map: Map) -> List[Tuple[int, int]]:
+        """개별 경로 탐색 (먼 목표는 도로망 또는 HPA*, 가까운 목표는 증분 계획기)"""
+        roads = self.route_mode(distance_to_goal)
+        if roads is not None:
+            # 도로 이동이 빠른 부대: 진입/진출 구간만 A*, 나머지는 도로망 그래프 (도로가 더 느리면 [])
+            path = road_pathfinding(battle_map, start, goal, roads)
+            if path:
+                self.planner = None
+                return path
+        if distance_to_goal >= HPA_MIN_DISTANCE:
+            # 먼 목표: HPA* 로 현재 위치 근처 구간만 세밀화 (다 가면 다시 탐색)
+            self.planner = None
+            path = hpa_pathfinding(battle_map, start, goal)
+            if not path:
+                path = astar_pathfinding(battle_map, start, goal)
+            return path
+        return self.plan_incremental(start, goal, battle_map)
+
+    def plan_incremental(self, start, goal, battle_map: Map) -> List[Tuple[int, int]]:
+        """같은 목표면 기존 탐색 상태를 이어서 보수 (D* Lite), 실패하면 A*"""
+        if self.planner is None or self.planner.goal != goal:
+            self.planner = DStarLite(battle_map, goal)
+        path = self.planner.plan(start)
+        if not path:
+            self.planner = None
+            path = astar_pathfinding(battle_map, start, goal)
+        return path
+
+    def path_is_stale(self, dest, battle_map: Map) -> bool:
+        """현재 경로를 보수해야 하는지 (목표 이동 / 비용 변경 / 경로 이탈)"""
+        goal = (int(dest.x), int(dest.y))
+        if self.path_goal is None or math.hypot(
+            goal[0] - self.path_goal[0], goal[1] - self.path_goal[1]
+        ) >= GOAL_MOVE_TOLERANCE:
+            return True
+        if battle_map.cost_version != self.path_cost_version:
+            return True
+        target_x, target_y = self.path[self.path_index]
+        return math.hypot(target_x - self.coord.x, target_y - self.coord.y) > PATH_DRIFT_TOLERANCE
+
     def should_use_flow_field(self, battle_map: Map) -> bool:
         """플로우 필드 사용 여부 결정"""
         # 같은 목표를 가진 아군이 많으면 플로우 필드 사용
@@ -559,12 +743,14 @@ class Troop:  # Troop class to store troop information and actions
 
     def get_flow_field_path(self, goal: Tuple[int, int], battle_map: Map) -> List[Tuple[int, int]]:
         """🟢 수정된 플로우 필드 경로 생성 - 실수 좌표 사용"""
-        goal_key = f"{goal[0]}_{goal[1]}"
-
-        if goal_key not in battle_map.flow_fields:
-            battle_map.flow_fields[goal_key] = build_flow_field(battle_map, goal)
-
-        flow_field = battle_map.flow_fields[goal_key]
+        key = self.flow_field_key(goal)
+        if key is None:
+            # 목적지 구역 안: 남은 짧은 거리는 A* 로 목적지 셀까지
+            return astar_pathfinding(battle_map, (int(self.coord.x), int(self.coord.y)), goal)
+        if key == self.dest_region:
+            flow_field = battle_map.get_region_flow_field(key)  # 목적지 구역 공유 필드
+        else:
+            flow_field = battle_map.get_flow_field(key)
 
         # 🟢 핵심 수정: 실수 좌표로 경로 생성
         path = []
@@ -579,7 +765,7 @@ class Troop:  # Troop class to store troop information and actions
             if not (0 <= yi < battle_map.height and 0 <= xi < battle_map.width):
                 break
 
-            dx, dy = flow_field[yi, xi]
+            dx, dy = direction_at(flow_field, xi, yi)
             if dx == 0 and dy == 0:
                 break
 
@@ -740,13 +926,18 @@ class Troop:  # Troop class to store troop information and actions
 
 
 class TroopList:  # Troop list to manage all troops
-    def __init__(self, troop_list):
+    def __init__(self, troop_list, store: TroopStore = None):
         self.troops = []
         self.blue_troops = []
         self.red_troops = []
         self.troop_ids = []
-        self.blue_observed = []
-        self.red_observed = []
+        self.path_queue = PathRequestQueue()  # 틱 예산 안에서 처리하는 경로 요청
+        # 이 시뮬레이션의 열 저장소 (다른 저장소에서 만든 부대는 옮겨 옴)
+        self.store = store if store is not None else TroopStore()
+        self.blue_observed = ObservedSet(self.store)  # 관측된 blue 부대 (삽입 순서 유지, O(1) 조회)
+        self.red_observed = ObservedSet(self.store)
+        self.observation_snapshot = None  # 지난 관측 판정 시점의 (x, y, z, live) 열 복사본
+        self.observation_checks = 0  # 관측 판정한 관측자-적 쌍 수 (튜닝용)
 
         for troop in troop_list:
             self.troops.append(troop)
@@ -759,19 +950,34 @@ class TroopList:  # Troop list to manage all troops
                 self.blue_troops.append(troop)
             elif troop.team == "red":
                 self.red_troops.append(troop)
+        targets = {troop: troop.target for troop in self.troops if troop.store is not self.store}
+        for troop in targets:
+            self.store.adopt(troop)
+        for troop, target in targets.items():
+            troop.target = target if target is not None and target.store is self.store else None
+        # 열 저장소의 행 번호 (죽어서 목록에서 빠진 부대도 alive=False 로 남으므로 다시 만들 필요 없음)
+        self.rows = self.store.rows_of(self.troops)
+        self.blue_rows = self.store.rows_of(self.blue_troops)
+        self.red_rows = self.store.rows_of(self.red_troops)
+        self.update_list_position()
+        self.update_engagement()
         self.assign_targets(0.0)
 
+    def update_list_position(self):
+        """행 -> blue_troops / red_troops 안의 위치 (섞을 때마다 갱신, 목록에서 빠져도 나머지 순서는 그대로)"""
+        self.list_position = np.zeros(self.store.size, dtype=np.int64)
+        for troops in (self.blue_troops, self.red_troops):
+            self.list_position[self.store.rows_of(troops)] = np.arange(len(troops))
+
     def remove_troop(self, troop: Troop):
         if troop in self.troops:
             self.troops.remove(troop)
             if troop.team == "blue":
                 self.blue_troops.remove(troop)
-                if troop in self.blue_observed:
-                    self.blue_observed.remove(troop)
+                self.blue_observed.discard(troop)
             elif troop.team == "red":
                 self.red_troops.remove(troop)
-                if troop in self.red_observed:
-                    self.red_observed.remove(troop)
+                self.red_observed.discard(troop)
 
     def remove_dead_troops(self):
         for troop in self.troops:
@@ -792,19 +998,53 @@ class TroopList:  # Troop list to manage all troops
         """🟢 관측 가능한 적군 추가"""
         if troop.active and troop.alive:
             if troop.team == "blue":
-                if troop not in self.blue_observed:
-                    self.blue_observed.append(troop)
+                self.blue_observed.add(troop)
             elif troop.team == "red":
-                if troop not in self.red_observed:
-                    self.red_observed.append(troop)
+                self.red_observed.add(troop)
             else:
                 print(f"[ERROR] wrong team affiliation: {troop.team}")
 
+    def update_engagement(self):
+        """이동이 끝난 뒤 이번 틱의 blue x red 거리/사거리 행렬을 새로 만듦"""
+        self.store.engagement = EngagementMatrix(
+            self.store, self.blue_rows, self.red_rows, blue_obs_buff=BLUE_OBS_BUFF
+        )
+
+    def observation_dirty(self) -> np.ndarray:
+        """지난 관측 판정 이후 위치가 바뀌었거나 새로 활성화된 행 (처음에는 모두)
+
+        시야/거리는 셀이 아니라 실제 좌표로 판정하므로 셀 변경이 아닌 좌표 변경을 본다.
+        """
+        store = self.store
+        n = store.size
+        live = store.live()
+        snapshot = self.observation_snapshot
+        if snapshot is None or len(snapshot[3]) != n:
+            dirty = np.ones(n, dtype=bool)
+        else:
+            x, y, z, was_live = snapshot
+            dirty = (store.x[:n] != x) | (store.y[:n] != y) | (store.z[:n] != z) | (live & ~was_live)
+        self.observation_snapshot = (store.x[:n].copy(), store.y[:n].copy(), store.z[:n].copy(), live)
+        return dirty
+
     def update_observation(self, battle_map: Map):
-        """🟢 관측 가능한 적군 업데이트"""
+        """🟢 관측 가능한 적군 업데이트 (바뀐 관측자-적 쌍만 다시 판정)"""
+        live = self.store.live().tolist()
+        # 죽었거나 비활성화된 관측 대상 정리
+        self.blue_observed.retain(lambda t: live[t.row])
+        self.red_observed.retain(lambda t: live[t.row])
+        self.update_engagement()
+        dirty = self.observation_dirty()
+        if not dirty.any():
+            return  # 아무도 움직이지 않았고 새로 활성화된 부대도 없음
+        # 관측자/적 둘 다 그대로인 쌍은 지난 틱과 결과가 같으므로 (관측 안 됨) 제외
+        # 이미 관측된 적도 제외 (판정 중에는 추가만 되므로 시작 시점 기준으로 빼도 같음)
+        observed = self.blue_observed.row_mask() | self.red_observed.row_mask()
+        candidates = self.store.engagement.observation_candidates(self.observation_snapshot[3], dirty, observed)
         for troop in self.troops:
-            if troop.alive and getattr(troop, 'active', False):
-                troop.find_observed_enemies(self, battle_map)
+            rows = candidates.get(troop.row)
+            if rows is not None:
+                troop.find_observed_enemies(self, battle_map, rows.tolist())
 
     def assign_targets(self, current_time):
 
@@ -826,14 +1066,15 @@ class TroopList:  # Troop list to manage all troops
 
         # ========== 수정 3: 활성화된 부대만 타겟 할당 ==========
         targets_assigned = 0
+        live = self.store.live().tolist()
         for troop in self.troops:
             if troop.alive and getattr(troop, 'active', False):
                 old_target = troop.target
 
                 if troop.team == "blue":
-                    troop.assign_target(current_time, active_red_troops)
+                    troop.assign_target(current_time, active_red_troops, live)
                 elif troop.team == "red":
-                    troop.assign_target(current_time, active_blue_troops)
+                    troop.assign_target(current_time, active_blue_troops, live)
 
                 # 새 타겟이 할당되었는지 확인
                 if troop.target != old_target and troop.target is not None:
@@ -872,13 +1113,14 @@ class TroopList:  # Troop list to manage all troops
         active_blue_troops = self.blue_observed
         active_red_troops = self.red_observed
         targets_assigned = 0
+        live = self.store.live().tolist()
 
         for troop in self.troops:
             if troop.alive and getattr(troop, 'active', False) and troop.target is None:
                 if troop.team == "blue":
-                    troop.assign_target(current_time, active_red_troops)
+                    troop.assign_target(current_time, active_red_troops, live)
                 elif troop.team == "red":
-                    troop.assign_target(current_time, active_blue_troops)
+                    troop.assign_target(current_time, active_blue_troops, live)
 
                 # 새 타겟이 할당되었는지 확인
                 if troop.target is not None:
@@ -898,27 +1140,24 @@ class TroopList:  # Troop list to manage all troops
             return None
 
     def get_next_battle_time(self):
-        next_battle_time = float("inf")
-        for troop in self.troops:
-            if troop.alive:
-                if troop.next_fire_time < next_battle_time:
-                    next_battle_time = troop.next_fire_time
-        return next_battle_time
+        rows = self.rows[self.store.alive[self.rows]]
+        if not rows.size:
+            return float("inf")
+        return float(self.store.next_fire_time[rows].min())
 
     def shuffle_troops(self):
         random.shuffle(self.troops)
         random.shuffle(self.blue_troops)
         random.shuffle(self.red_troops)
+        self.update_list_position()
 
     def fire(self, current_time, history):
 
         self.shuffle_troops()
 
         # ========== 수정: 활성화된 부대만 사격 ==========
-        firing_troops = [t for t in self.troops 
-                        if (t.next_fire_time <= current_time and 
-                            t.alive and 
-                            getattr(t, 'active', False))]
+        ready = self.store.ready_to_fire(current_time).tolist()
+        firing_troops = [t for t in self.troops if ready[t.row]]
 
         print(f"[{current_time:.1f}] {len(firing_troops)}개 유닛 사격 시도")
 
@@ -999,29 +1238,36 @@ def terminate(troop_list:TroopList, current_time):
     if current_time >= MAX_TIME:
         return True
 
-    if not any(t.alive for t in troop_list.blue_troops) or not any(t.alive for t in troop_list.red_troops):
+    store = troop_list.store
+    if not store.alive[troop_list.blue_rows].any() or not store.alive[troop_list.red_rows].any():
         print(f"[{current_time:.1f}] 전투 종료: 모든 부대가 파괴됨")
         return True
 
-    for troop in troop_list.troops:
-        if troop.type == UnitType.TANK and troop.alive:
-            return False
-        if troop.type == UnitType.APC and troop.alive:
-            return False
+    armored = store.alive[:store.size] & store.of_types(UnitType.TANK, UnitType.APC)
+    if armored[troop_list.rows].any():
+        return False
     print(f"[{current_time:.1f}] 전투 종료: 모든 전차와 APC가 파괴됨")
     return True
 
 #!TEMP >>>>
 def update_troop_location_improved(troop_list: TroopList, battle_map, current_time):
     """개선된 부대 이동 업데이트"""
+    store = troop_list.store
+    n = store.size
+    store.engagement = None  # 좌표가 바뀌므로 이번 틱 행렬은 update_observation 에서 다시 만듦
+
+    # 활성화되지 않은 부대는 이동하지 않음 (속도 0 은 이 목록의 행만 한꺼번에)
+    moving = store.live() & store.can_move[:n]
+    rows = troop_list.rows
+    stopped = rows[store.alive[rows] & ~moving[rows]]
+    store.vx[stopped] = store.vy[stopped] = store.vz[stopped] = 0.0
+    moving = moving.tolist()
+
+    # 이전 틱에서 예산을 넘겨 밀린 경로 요청 / 워커 결과를 이동 전에 처리
+    troop_list.path_queue.process(battle_map, current_time)
 
     for troop in troop_list.troops:
-        if not troop.alive:
-            continue
-        
-        # 활성화되지 않은 부대는 이동하지 않음
-        if not troop.active or not troop.can_move:
-            troop.update_velocity(Velocity(0, 0, 0))
+        if not moving[troop.row]:
             continue
 
         # 목적지 우선순위 결정
@@ -1054,7 +1300,7 @@ def update_troop_location_improved(troop_list: TroopList, battle_map, current_ti
             dest = troop.coord  # 제자리
 
         # 개선된 이동 계산
-        velocity = troop.compute_velocity_advanced(dest, battle_map, current_time)
+        velocity = troop.compute_velocity_advanced(dest, battle_map, current_time, troop_list.path_queue)
         troop.update_velocity(velocity)
         troop.update_coord()
 
@@ -1067,4 +1313,5 @@ def update_troop_location_improved(troop_list: TroopList, battle_map, current_ti
         if not (0 <= troop.coord.x < battle_map.width and 
                 0 <= troop.coord.y < battle_map.height):
             troop.alive = False
+
 #!TEMP <<<<
@@ -0,0 +1,235 @@
+# troop_store.py
+
+import numpy as np
+
+from .map import Coord, Velocity
+from .unit_definitions import UnitType
+
+
+TROOP_STORE_CAPACITY = 512  # 초기 행 수 (넘으면 두 배로 늘림)
+TEAM_CODES = {"blue": 0, "red": 1}
+TYPE_CODES = {unit_type: code for code, unit_type in enumerate(UnitType)}
+
+
+class TroopStore:
+    """부대 상태를 열(column)별 NumPy 배열로 보관하는 저장소 (structure of arrays)
+
+    시뮬레이션(TroopList) 하나가 저장소 하나를 가진다 (클래스 공용이 아님).
+    Troop 하나가 한 행(row)이고, Troop 의 coord / velocity / alive / active / can_move /
+    next_fire_time / range_km / target 은 이 행을 읽고 쓰는 속성이다 (기존 코드는 그대로 동작).
+    틱마다 도는 필터/집계 (생존, 활성, 사격 가능 등) 는 부대를 하나씩 보지 않고 배열 연산으로 한다.
+    행은 지워지지 않는다 (죽은 부대는 alive=False 로 남음).
+    """
+
+    FLOAT_COLUMNS = ("x", "y", "z", "vx", "vy", "vz", "next_fire_time", "range_km")
+    FLOAT32_COLUMNS = ("z",)  # 고도는 DEM 과 같은 float32 (기록 파일 형식 유지)
+    BOOL_COLUMNS = ("alive", "active", "can_move")
+
+    def __init__(self, capacity=TROOP_STORE_CAPACITY):
+        self.size = 0
+        self.troops = []  # row -> Troop
+        for name in self.FLOAT_COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=np.float32 if name in self.FLOAT32_COLUMNS else np.float64))
+        for name in self.BOOL_COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=bool))
+        self.team = np.full(capacity, -1, dtype=np.int8)
+        self.type_code = np.full(capacity, -1, dtype=np.int16)
+        self.target = np.full(capacity, -1, dtype=np.int64)  # 표적 부대의 행, 없으면 -1
+        self.engagement = None  # 이번 틱의 EngagementMatrix (이동 중에는 None)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.x)
+
+    def add(self, troop) -> int:
+        """새 행을 만들어 반환 (값은 Troop.__init__ 에서 속성으로 채움)"""
+        if self.size == self.capacity:
+            self._grow(2 * self.capacity)
+        row = self.size
+        self.size += 1
+        self.troops.append(troop)
+        self.team[row] = TEAM_CODES.get(troop.team, -1)
+        self.type_code[row] = TYPE_CODES[troop.type]
+        return row
+
+    def adopt(self, troop) -> int:
+        """다른 저장소의 부대를 이 저장소의 새 행으로 옮김 (표적은 옮기지 않으므로 호출 측에서 다시 지정)"""
+        old_store, old_row = troop.store, troop.row
+        row = self.add(troop)
+        for name in self.FLOAT_COLUMNS + self.BOOL_COLUMNS:
+            getattr(self, name)[row] = getattr(old_store, name)[old_row]
+        troop.store, troop.row = self, row
+        for view in (getattr(troop, "_coord", None), getattr(troop, "_velocity", None)):
+            if view is not None:
+                view.store, view.row = self, row
+        return row
+
+    def _grow(self, capacity):
+        for name in self.FLOAT_COLUMNS + self.BOOL_COLUMNS + ("team", "type_code", "target"):
+            old = getattr(self, name)
+            new = np.full(capacity, -1 if name in ("team", "type_code", "target") else 0, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def rows_of(self, troops) -> np.ndarray:
+        return np.fromiter((t.row for t in troops), dtype=np.int64, count=len(troops))
+
+    # ---- 틱 단위 마스크 (행 인덱스로 조회) ----
+    def live(self) -> np.ndarray:
+        """살아 있고 활성화된 부대"""
+        n = self.size
+        return self.alive[:n] & self.active[:n]
+
+    def ready_to_fire(self, current_time) -> np.ndarray:
+        n = self.size
+        return (self.next_fire_time[:n] <= current_time) & self.live()
+
+    def of_types(self, *unit_types) -> np.ndarray:
+        return np.isin(self.type_code[:self.size], [TYPE_CODES[t] for t in unit_types])
+
+    def distances_from(self, row) -> np.ndarray:
+        """row 부대에서 모든 행까지의 3차원 거리 (km, Troop.get_distance 와 같은 식)"""
+        n = self.size
+        dx = self.x[:n] - self.x[row]
+        dy = self.y[:n] - self.y[row]
+        dz = self.z[:n].astype(np.float64) - float(self.z[row])  # EngagementMatrix 와 같이 float64
+        return np.sqrt(dx * dx + dy * dy + dz * dz) * 0.01
+
+
+def _column(name, scalar=False):
+    def fget(self):
+        if scalar:
+            return getattr(self.store, name)[self.row]  # NumPy 스칼라 (dtype 유지)
+        return getattr(self.store, name).item(self.row)  # Python float / bool 로 반환
+
+    def fset(self, value):
+        getattr(self.store, name)[self.row] = value
+
+    return property(fget, fset)
+
+
+class CoordView(Coord):
+    """TroopStore 한 행의 (x, y, z) — Coord 와 같은 인터페이스"""
+
+    def __init__(self, store: TroopStore, row: int):
+        self.store = store
+        self.row = row
+
+    x = _column("x")
+    y = _column("y")
+    z = _column("z", scalar=True)
+
+
+class VelocityView(Velocity):
+    """TroopStore 한 행의 (vx, vy, vz) — Velocity 와 같은 인터페이스"""
+
+    def __init__(self, store: TroopStore, row: int):
+        self.store = store
+        self.row = row
+
+    x = _column("vx")
+    y = _column("vy")
+    z = _column("vz")
+
+
+class StoreBacked:
+    """Troop 의 행 기반 속성 (store / row 를 가진 클래스에 섞어 쓴다)"""
+
+    alive = _column("alive")
+    active = _column("active")
+    can_move = _column("can_move")
+    next_fire_time = _column("next_fire_time")
+    range_km = _column("range_km")
+
+    @property
+    def coord(self) -> CoordView:
+        return self._coord
+
+    @coord.setter
+    def coord(self, value):
+        # 다른 Coord 를 대입해도 참조가 아니라 값을 행에 복사 (기존 CoordView 를 가진 쪽도 같이 갱신됨)
+        if not hasattr(self, "_coord"):
+            self._coord = CoordView(self.store, self.row)
+        self._coord.x, self._coord.y, self._coord.z = value.x, value.y, value.z
+
+    @property
+    def velocity(self) -> VelocityView:
+        return self._velocity
+
+    @velocity.setter
+    def velocity(self, value):
+        if not hasattr(self, "_velocity"):
+            self._velocity = VelocityView(self.store, self.row)
+        self._velocity.x, self._velocity.y, self._velocity.z = value.x, value.y, value.z
+
+    @property
+    def target(self):
+        row = self.store.target.item(self.row)
+        return None if row < 0 else self.store.troops[row]
+
+    @target.setter
+    def target(self, troop):
+        self.store.target[self.row] = -1 if troop is None else troop.row
+
+
+class ObservedSet:
+    """관측된 부대 집합 (TroopList.blue_observed / red_observed)
+
+    dict 로 삽입 순서를 유지하므로 순회 순서는 리스트와 같고 (시드 고정 시 재현 가능),
+    추가/삭제/포함 검사는 O(1) 이다. 행 비트마스크(mask)로 배열 연산에서도 바로 걸러낼 수 있다.
+    """
+
+    def __init__(self, store: TroopStore, troops=()):
+        self.store = store
+        self._troops = {}  # troop -> None (삽입 순서)
+        self.mask = np.zeros(store.capacity, dtype=bool)  # 행 -> 관측 여부
+        self.order = np.zeros(store.capacity, dtype=np.int64)  # 행 -> 추가된 순번 (순회 순서)
+        self._seq = 0
+        for troop in troops:
+            self.add(troop)
+
+    def __contains__(self, troop) -> bool:
+        return troop in self._troops
+
+    def __iter__(self):
+        return iter(self._troops)
+
+    def __len__(self) -> int:
+        return len(self._troops)
+
+    def __repr__(self):
+        return f"ObservedSet({[t.id for t in self._troops]})"
+
+    def row_mask(self) -> np.ndarray:
+        """행 -> 관측 여부 (저장소가 커졌으면 맞춰 늘림)"""
+        if len(self.mask) < self.store.capacity:
+            extra = self.store.capacity - len(self.mask)
+            self.mask = np.concatenate([self.mask, np.zeros(extra, dtype=bool)])
+            self.order = np.concatenate([self.order, np.zeros(extra, dtype=np.int64)])
+        return self.mask
+
+    def add(self, troop):
+        if troop in self._troops:
+            return
+        self._troops[troop] = None
+        self.row_mask()[troop.row] = True
+        self.order[troop.row] = self._seq
+        self._seq += 1
+
+    append = add  # 기존 리스트 코드 호환
+
+    def remove(self, troop):
+        del self._troops[troop]
+        self.mask[troop.row] = False
+
+    def discard(self, troop):
+        if troop in self._troops:
+            self.remove(troop)
+
+    def retain(self, keep):
+        """keep(troop) 이 참인 부대만 남김 (순서 유지)"""
+        for troop in [t for t in self._troops if not keep(t)]:
+            self.remove(troop)
+
+    def rows(self) -> np.ndarray:
+        return np.fromiter((t.row for t in self._troops), dtype=np.int64, count=len(self._troops))
@@ -0,0 +1,45 @@
+# test_dstar_lite.py
+
+import math
+
+import numpy as np
+
+from modules.map import Map, NEIGHBOR_STEPS, build_distance_field
+from modules.dstar_lite import DStarLite
+
+
+def path_cost(battle_map, path):
+    grid = battle_map.get_path_grid()
+    total = 0.0
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        base = next(b for dx, dy, b in NEIGHBOR_STEPS if (dx, dy) == (x1 - x0, y1 - y0))
+        total += grid.cost_list[grid.index(x1, y1)] * base
+    return total
+
+
+def edge_goal(battle_map):
+    """맨 아래 행에서 양옆 이웃도 통과 가능한 목표 셀"""
+    y = battle_map.height - 1
+    row = battle_map.cost_map[y]
+    for x in range(battle_map.width // 2, battle_map.width - 2):
+        if np.isfinite(row[x - 1:x + 2]).all() and np.isfinite(battle_map.cost_map[y - 30, x]):
+            return x, y
+    raise AssertionError("no passable bottom-row cell")
+
+
+def test_edge_cost_change_replans():
+    battle_map = Map()
+    gx, gy = edge_goal(battle_map)
+    start = (gx, gy - 30)
+    planner = DStarLite(battle_map, (gx, gy))
+    assert planner.plan(start)
+
+    # 목표 옆 맨 아래 행 셀 비용 변경 (선행 셀에 테두리 셀이 포함됨)
+    battle_map.set_cell_cost(gx - 1, gy, 50.0)
+    battle_map.set_cell_cost(gx + 1, gy, math.inf)
+    path = planner.plan(start)
+
+    assert path and path[0] == start and path[-1] == (gx, gy)
+    # 바뀐 비용에서의 최단 거리 (역방향 거리장 = 각 셀 -> goal)
+    optimal = build_distance_field(battle_map, (gx, gy), reverse=True)[start[1], start[0]]
+    assert math.isclose(path_cost(battle_map, path), optimal, rel_tol=1e-6)
@@ -0,0 +1,32 @@
+# test_flow_field.py
+
+import numpy as np
+
+from modules.map import FlowFieldCache, Map, build_region_flow_field, region_cells
+
+
+def test_region_without_passable_cells():
+    battle_map = Map()
+    region = ((10, 14), (10, 14))
+    for y in range(10, 15):
+        for x in range(10, 15):
+            battle_map.set_cell_cost(x, y, np.inf)
+    assert region_cells(battle_map, region) == []
+
+    flow_field = build_region_flow_field(battle_map, region)
+    assert flow_field.shape[:2] == (battle_map.height, battle_map.width)
+    assert not flow_field.any()  # 도달할 수 없으므로 방향 없음
+
+
+def test_cache_clear_keeps_cumulative_counters():
+    cache = FlowFieldCache(max_bytes=2 * 10 * 10 * 2 * 2)  # float16 10x10 필드 2개
+    for x in range(3):
+        cache.put((x, 0), np.ones((10, 10, 2)))
+    assert cache.get((2, 0)) is not None
+    assert cache.get((0, 0)) is None
+    assert (len(cache), cache.bytes, cache.evictions) == (2, 800, 1)
+
+    cache.clear()
+    info = cache.info()
+    assert (info["entries"], info["bytes"]) == (0, 0)
+    assert (info["hits"], info["misses"], info["evictions"]) == (1, 1, 1)
@@ -0,0 +1,26 @@
+# test_observation.py
+
+import random
+
+from modules.map import Coord, Map
+from modules.troop import Troop, TroopList
+
+
+def test_observed_enemies_follow_shuffled_list_order():
+    battle_map = Map()
+    x, y = 400, 300
+    z = float(battle_map.dem_arr[y, x])
+    observer = Troop("Sho't_Kal", Coord(x, y, z))
+    enemies = [Troop("T-55", Coord(x + dx, y, float(battle_map.dem_arr[y, x + dx]))) for dx in range(1, 7)]
+    for troop in [observer] + enemies:
+        troop.active = True
+    troop_list = TroopList([observer] + enemies)
+
+    random.seed(3)
+    troop_list.shuffle_troops()
+    troop_list.update_observation(battle_map)
+
+    # 관측 목록은 행 번호 순이 아니라 적 팀 목록 (섞인 순서) 순
+    expected = [t for t in troop_list.red_troops if t in troop_list.red_observed]
+    assert len(expected) > 1
+    assert list(troop_list.red_observed) == expected
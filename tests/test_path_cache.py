@@ -0,0 +1,15 @@
+# test_path_cache.py
+
+from modules.map import PathCache
+
+
+def test_road_paths_are_keyed_by_speed_ratio():
+    cache = PathCache(join_radius=5)
+    path = [(0, 0), (10, 0), (20, 0), (30, 0), (50, 60)]
+    cache.put((50, 60), path, mode=2.0)
+    cache.put((50, 60), path[:-1], mode=None)  # 목표까지 이어지지 않은 경로는 저장 안 함
+
+    assert cache.nearest((12, 3), (50, 60), 2.0)[1] == 1  # 경로 근처에서 출발, 같은 도로 속도 비율
+    assert cache.nearest((12, 3), (50, 60), 1.5) is None  # 도로 속도 비율이 다른 부대
+    assert cache.nearest((12, 3), (50, 60)) is None  # HPA* / A* 경로
+    assert cache.nearest((12, 9), (50, 60), 2.0) is None  # 경로에서 너무 멂
@@ -0,0 +1,32 @@
+# test_viewshed.py
+
+from modules.map import Coord, Map
+
+
+def test_viewshed_cache_byte_budget():
+    probe = Map()
+    raster_bytes = probe.height * probe.width  # int8 래스터 한 장
+    battle_map = Map(viewshed_cache_bytes=2 * raster_bytes)
+
+    for x in range(100, 104):
+        battle_map.get_viewshed(x, 200)
+    assert list(battle_map.viewsheds) == [(102, 200, 2.0, 2.0), (103, 200, 2.0, 2.0)]
+    assert battle_map.viewshed_bytes == 2 * raster_bytes
+
+    battle_map = Map(viewshed_cache_bytes=0)  # 예산이 작아도 방금 만든 뷰쉐드는 유지
+    battle_map.get_viewshed(100, 200)
+    assert len(battle_map.viewsheds) == 1
+
+
+def test_los_cache_clear_keeps_cumulative_counters():
+    battle_map = Map()
+    observer = Coord(100, 200, float(battle_map.dem_arr[200, 100]))
+    for _ in range(2):
+        battle_map.visible_many(observer, [110, 120], [205, 210])
+    before = battle_map.los_cache_info()
+    assert before["hits"] > 0 and before["misses"] > 0
+
+    battle_map.clear_los_cache()
+    after = battle_map.los_cache_info()
+    assert after["entries"] == 0
+    assert (after["hits"], after["misses"]) == (before["hits"], before["misses"])